@@ -0,0 +1,144 @@
+# backend/api/encoding.py - Fast JSON responses and compact mind map encoding
+import json
+from typing import Any, Dict, List
+
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # optional speedup
+    orjson = None
+
+COMPACT_FORMAT = "columnar-v1"
+COMPACT_MEDIA_TYPE = "application/vnd.synapsemind.columnar+json"
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSON response rendered with orjson when it is installed, otherwise
+    with the stdlib encoder minus the default whitespace
+    """
+
+    def render(self, content: Any) -> bytes:
+        if orjson is not None:
+            return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+        return json.dumps(
+            content,
+            ensure_ascii=False,
+            allow_nan=False,
+            separators=(",", ":"),
+        ).encode("utf-8")
+
+
+def wants_compact(format_param: str, accept: str) -> bool:
+    """True if the client asked for the columnar mind map encoding"""
+    return format_param == "compact" or COMPACT_MEDIA_TYPE in (accept or "")
+
+
+def _intern(table: List[str], index: Dict[str, int], value: str) -> int:
+    if value not in index:
+        index[value] = len(table)
+        table.append(value)
+    return index[value]
+
+
+def encode_compact_mindmap(nodes: List[Dict[str, Any]], edges: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Encode a mind map column-wise.
+
+    Node fields become parallel arrays, node types and edge labels are
+    interned into lookup tables, and edges are [source, target] pairs of
+    node array indices. Edge ids are positional ("edge_<i>") and are not
+    sent. Missing values are -1 for table indices and null otherwise.
+    """
+    types: List[str] = []
+    type_index: Dict[str, int] = {}
+    labels: List[str] = []
+    label_index: Dict[str, int] = {}
+
+    ids = []
+    node_labels = []
+    node_types = []
+    sizes = []
+    positions = []
+    has_positions = False
+    position_of = {}
+
+    for i, node in enumerate(nodes):
+        position_of[node["id"]] = i
+        ids.append(node["id"])
+        node_labels.append(node.get("label", ""))
+        node_types.append(_intern(types, type_index, node["type"]) if node.get("type") else -1)
+        sizes.append(node.get("size"))
+        position = node.get("position")
+        if position:
+            has_positions = True
+            positions.append([position.get("x", 0.0), position.get("y", 0.0)])
+        else:
+            positions.append(None)
+
+    pairs = []
+    edge_labels = []
+    dashed = []
+    for i, edge in enumerate(edges):
+        source = position_of.get(edge["source"])
+        target = position_of.get(edge["target"])
+        if source is None or target is None:
+            continue
+        pairs.append([source, target])
+        edge_labels.append(_intern(labels, label_index, edge["label"]) if edge.get("label") else -1)
+        if edge.get("dashed"):
+            dashed.append(len(pairs) - 1)
+
+    encoded = {
+        "format": COMPACT_FORMAT,
+        "types": types,
+        "labels": labels,
+        "nodes": {
+            "id": ids,
+            "label": node_labels,
+            "type": node_types,
+            "size": sizes,
+        },
+        "edges": pairs,
+        "edge_label": edge_labels,
+        "dashed": dashed,
+    }
+    if has_positions:
+        encoded["nodes"]["position"] = positions
+    return encoded
+
+
+def decode_compact_mindmap(encoded: Dict[str, Any]) -> Dict[str, List[Dict[str, Any]]]:
+    """Inverse of encode_compact_mindmap"""
+    types = encoded["types"]
+    labels = encoded["labels"]
+    columns = encoded["nodes"]
+    positions = columns.get("position")
+
+    nodes = []
+    for i, node_id in enumerate(columns["id"]):
+        node = {"id": node_id, "label": columns["label"][i]}
+        if columns["type"][i] >= 0:
+            node["type"] = types[columns["type"][i]]
+        if columns["size"][i] is not None:
+            node["size"] = columns["size"][i]
+        if positions and positions[i] is not None:
+            node["position"] = {"x": positions[i][0], "y": positions[i][1]}
+        nodes.append(node)
+
+    dashed = set(encoded.get("dashed", []))
+    edges = []
+    for i, (source, target) in enumerate(encoded["edges"]):
+        edge = {
+            "id": f"edge_{i}",
+            "source": columns["id"][source],
+            "target": columns["id"][target],
+        }
+        if encoded["edge_label"][i] >= 0:
+            edge["label"] = labels[encoded["edge_label"][i]]
+        if i in dashed:
+            edge["dashed"] = True
+        edges.append(edge)
+
+    return {"nodes": nodes, "edges": edges}
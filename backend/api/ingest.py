@@ -0,0 +1,240 @@
+# backend/api/ingest.py - Streaming request bodies: compressed JSON or raw text
+import codecs
+import zlib
+from typing import AsyncIterator, Callable, Dict, Type, TypeVar
+
+from fastapi import HTTPException, Request
+from fastapi.exceptions import RequestValidationError
+from pydantic import BaseModel, ValidationError
+
+from services.result_cache import TextNormalizer, normalize_text
+
+try:
+    import zstandard
+except ImportError:  # zstd is optional, gzip/deflate are always available
+    zstandard = None
+
+ModelT = TypeVar("ModelT", bound=BaseModel)
+
+
+def supported_encodings() -> tuple:
+    encodings = ("identity", "gzip", "deflate")
+    return encodings + ("zstd",) if zstandard is not None else encodings
+
+
+def _too_large(max_bytes: int) -> HTTPException:
+    return HTTPException(
+        status_code=413,
+        detail=f"Request body too large. Limit is {max_bytes} bytes after decompression."
+    )
+
+
+class _CappedSink:
+    """File-like target for zstandard's stream_writer that enforces the cap"""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.total = 0
+        self.pieces = []
+
+    def write(self, data: bytes) -> int:
+        self.total += len(data)
+        if self.total > self.max_bytes:
+            raise _too_large(self.max_bytes)
+        self.pieces.append(bytes(data))
+        return len(data)
+
+
+async def iter_body(request: Request, max_bytes: int) -> AsyncIterator[bytes]:
+    """
+    Yield the decoded request body as it arrives, honouring
+    Content-Encoding (gzip, deflate, zstd if installed). Decompression
+    output is bounded as it is produced, so a small compressed body can't
+    expand past max_bytes in memory; going over the cap raises 413.
+    """
+    encoding = request.headers.get("content-encoding", "identity").strip().lower() or "identity"
+    if encoding == "x-gzip":
+        encoding = "gzip"
+    if encoding not in supported_encodings():
+        raise HTTPException(
+            status_code=415,
+            detail=f"Unsupported Content-Encoding. Use: {', '.join(supported_encodings())}"
+        )
+
+    declared = request.headers.get("content-length", "")
+    if declared.isdigit() and int(declared) > max_bytes:
+        raise _too_large(max_bytes)
+
+    if encoding == "identity":
+        total = 0
+        async for chunk in request.stream():
+            total += len(chunk)
+            if total > max_bytes:
+                raise _too_large(max_bytes)
+            if chunk:
+                yield chunk
+        return
+
+    if encoding == "zstd":
+        sink = _CappedSink(max_bytes)
+        writer = zstandard.ZstdDecompressor().stream_writer(sink, write_return_read=True)
+        try:
+            async for chunk in request.stream():
+                writer.write(chunk)
+                for piece in sink.pieces:
+                    yield piece
+                sink.pieces.clear()
+            writer.flush()
+        except zstandard.ZstdError as e:
+            raise HTTPException(status_code=400, detail=f"Invalid zstd body: {e}")
+        for piece in sink.pieces:
+            yield piece
+        return
+
+    # gzip needs the 16 + MAX_WBITS header mode, raw zlib streams use the default
+    decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS if encoding == "gzip" else zlib.MAX_WBITS)
+    total = 0
+    try:
+        async for chunk in request.stream():
+            data = chunk
+            while data and not decompressor.eof:
+                piece = decompressor.decompress(data, max_bytes - total + 1)
+                total += len(piece)
+                if total > max_bytes:
+                    raise _too_large(max_bytes)
+                if piece:
+                    yield piece
+                data = decompressor.unconsumed_tail
+        piece = decompressor.flush()
+    except zlib.error as e:
+        raise HTTPException(status_code=400, detail=f"Invalid {encoding} body: {e}")
+    total += len(piece)
+    if total > max_bytes:
+        raise _too_large(max_bytes)
+    if piece:
+        yield piece
+    if not decompressor.eof:
+        raise HTTPException(status_code=400, detail=f"Truncated {encoding} body")
+
+
+async def read_plain_text(request: Request, max_bytes: int, charset: str = "utf-8") -> str:
+    """Decode and whitespace-normalize a text/plain body in one streaming pass"""
+    try:
+        decoder = codecs.getincrementaldecoder(charset)("strict")
+    except LookupError:
+        raise HTTPException(status_code=415, detail=f"Unsupported charset: {charset}")
+
+    normalizer = TextNormalizer()
+    try:
+        async for data in iter_body(request, max_bytes):
+            normalizer.feed(decoder.decode(data))
+        normalizer.feed(decoder.decode(b"", final=True))
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=400, detail=f"Body is not valid {charset} text")
+    return normalizer.result()
+
+
+def _validation_error(error: ValidationError, location: str) -> RequestValidationError:
+    # No "input": for a malformed body it is the raw bytearray, which the
+    # 422 handler can't serialize (and echoing the whole upload is useless)
+    return RequestValidationError([
+        {**detail, "loc": (location,) + tuple(detail["loc"])}
+        for detail in error.errors(include_input=False)
+    ])
+
+
+def _is_json(media_type: str) -> bool:
+    return media_type == "application/json" or media_type.endswith("+json")
+
+
+async def _read_json(request: Request, model: Type[ModelT], max_bytes: int) -> ModelT:
+    body = bytearray()
+    async for data in iter_body(request, max_bytes):
+        body += data
+    try:
+        return model.model_validate_json(body)
+    except ValidationError as e:
+        raise _validation_error(e, "body")
+
+
+def text_body(model: Type[ModelT], max_bytes: int) -> Callable:
+    """
+    Dependency that builds `model` from the request body, in place of a
+    plain body parameter. Accepts
+
+    - application/json: the usual model fields, parsed straight from bytes
+    - text/plain: the body is the `text` field, other fields come from
+      the query string (e.g. POST /api/summary?level=detailed)
+
+    either one optionally compressed (Content-Encoding: gzip, deflate,
+    zstd). `text` comes back whitespace-normalized, the same form the
+    result cache hashes.
+    """
+
+    async def dependency(request: Request) -> ModelT:
+        content_type = request.headers.get("content-type", "application/json")
+        media_type, _, params = content_type.partition(";")
+        media_type = media_type.strip().lower()
+
+        if media_type == "text/plain":
+            charset = "utf-8"
+            for param in params.split(";"):
+                name, _, value = param.strip().partition("=")
+                if name.lower() == "charset" and value:
+                    charset = value.strip('"').lower()
+            fields: Dict[str, str] = dict(request.query_params)
+            fields["text"] = await read_plain_text(request, max_bytes, charset)
+            try:
+                return model.model_validate(fields)
+            except ValidationError as e:
+                raise _validation_error(e, "query")
+
+        if _is_json(media_type):
+            parsed = await _read_json(request, model, max_bytes)
+            parsed.text = normalize_text(parsed.text)
+            return parsed
+
+        raise HTTPException(
+            status_code=415,
+            detail="Unsupported Content-Type. Use application/json or text/plain"
+        )
+
+    return dependency
+
+
+def json_body(model: Type[ModelT], max_bytes: int) -> Callable:
+    """
+    Dependency for JSON-only bodies without a `text` field: the same
+    Content-Encoding support and size cap as text_body()
+    """
+
+    async def dependency(request: Request) -> ModelT:
+        content_type = request.headers.get("content-type", "application/json")
+        if not _is_json(content_type.partition(";")[0].strip().lower()):
+            raise HTTPException(status_code=415, detail="Unsupported Content-Type. Use application/json")
+        return await _read_json(request, model, max_bytes)
+
+    return dependency
+
+
+def json_body_openapi(model: Type[BaseModel]) -> dict:
+    """openapi_extra documenting the body json_body() accepts"""
+    return {
+        "requestBody": {
+            "required": True,
+            "content": {"application/json": {"schema": model.model_json_schema()}},
+        }
+    }
+
+
+def text_body_openapi(model: Type[BaseModel]) -> dict:
+    """openapi_extra documenting both body forms text_body() accepts"""
+    return {
+        "requestBody": {
+            "required": True,
+            "content": {
+                "application/json": {"schema": model.model_json_schema()},
+                "text/plain": {"schema": {"type": "string"}},
+            },
+        }
+    }
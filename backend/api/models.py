@@ -1,13 +1,32 @@
 # backend/api/models.py - Data models for API
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import List, Optional, Dict, Any
 
+from config import Config
+
 class SummaryRequest(BaseModel):
     text: str
     level: str = "quick"  # quick, detailed, academic
+    all_levels: bool = False  # generate academic once, derive the rest from it
 
 class MindMapRequest(BaseModel):
     text: str
+    layout: Optional[str] = None  # radial, force; None leaves positions to the client
+
+class LookupRequest(BaseModel):
+    hash: str  # sha256 hex of the normalized text
+    kind: str = "summary"  # summary, mindmap
+    level: str = "quick"  # summaries only
+    layout: Optional[str] = None  # mind maps only
+
+class ProfilingSettings(BaseModel):
+    mode: str = "off"  # off, trace, profile
+    sample_rate: float = 1.0
+
+class JobRequest(BaseModel):
+    text: str
+    level: str = "quick"  # quick, detailed, academic
+    kind: str = "summary"
 
 class SummaryResponse(BaseModel):
     status: str
@@ -18,15 +37,30 @@ class SummaryResponse(BaseModel):
 class MindMapNode(BaseModel):
     id: str
     label: str
-    type: str  # main, sub, detail
+    type: str  # central, branch, detail (fallback maps: main, sub)
+    size: Optional[int] = None
     position: Optional[Dict[str, float]] = None
 
 class MindMapEdge(BaseModel):
+    id: Optional[str] = None
     source: str
     target: str
     label: Optional[str] = None
+    dashed: Optional[bool] = None
+
+class MindMapGraph(BaseModel):
+    nodes: List[MindMapNode]
+    edges: List[MindMapEdge] = []
+
+class MindMapMergeRequest(BaseModel):
+    maps: List[MindMapGraph]
+    max_nodes: int = Field(Config.MINDMAP_MERGE_MAX_NODES, ge=1, le=Config.MINDMAP_MERGE_NODE_LIMIT)
+    layout: Optional[str] = None  # radial, force
 
 class MindMapResponse(BaseModel):
     status: str
     nodes: List[MindMapNode]
-    edges: List[MindMapEdge]
\ No newline at end of file
+    edges: List[MindMapEdge]
+    total_concepts: int = 0
+    cached: Optional[bool] = None
+    timestamp: Optional[str] = None
@@ -0,0 +1,91 @@
+# backend/api/tracing.py - Server-Timing spans and on-demand request profiling
+import asyncio
+import hmac
+import logging
+import random
+from typing import Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from services.tracing import ProfileStore, end_trace, start_trace
+
+logger = logging.getLogger("synapsemind")
+
+PROFILING_MODES = ("off", "trace", "profile")
+
+
+class ProfilingControl:
+    """
+    Runtime switch for tracing/profiling, flipped through the admin endpoint.
+    mode "trace" adds Server-Timing; "profile" also writes a cProfile dump.
+    sample_rate is the fraction of requests the mode applies to.
+    """
+
+    def __init__(self, token: str = "", mode: str = "off", sample_rate: float = 1.0):
+        self.token = token
+        self.mode = mode
+        self.sample_rate = sample_rate
+
+    def authorized(self, supplied: Optional[str]) -> bool:
+        # Without a configured token, profiling can't be enabled remotely
+        if not self.token or not supplied:
+            return False
+        # compare_digest rejects non-ASCII str; header values are decoded as
+        # latin-1, so compare the raw bytes against the UTF-8 token
+        return hmac.compare_digest(self.token.encode("utf-8"), supplied.encode("latin-1", "replace"))
+
+    def mode_for(self, headers: Headers) -> str:
+        requested = headers.get("x-profile", "").lower()
+        if requested in ("trace", "profile") and self.authorized(headers.get("x-profile-token")):
+            return requested
+        if self.mode != "off" and random.random() < self.sample_rate:
+            return self.mode
+        return "off"
+
+
+class TracingMiddleware:
+    """
+    Start a trace for opted-in requests, return its spans in a
+    Server-Timing header and, in profile mode, write the merged profile
+    to the ProfileStore (the .prof file name ends with X-Profile-Id)
+    """
+
+    def __init__(self, app: ASGIApp, control: ProfilingControl, store: ProfileStore):
+        self.app = app
+        self.control = control
+        self.store = store
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        mode = self.control.mode_for(Headers(scope=scope))
+        if mode == "off":
+            await self.app(scope, receive, send)
+            return
+
+        trace, token = start_trace(profile=(mode == "profile"))
+        profile_name = None
+        if trace.profile:
+            # Decide the file name up front so it can go in the response headers
+            profile_name = f"{id(trace):x}"
+
+        async def send_wrapper(message: Message):
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                headers.append("Server-Timing", trace.server_timing())
+                if profile_name:
+                    headers["X-Profile-Id"] = profile_name
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            end_trace(token)
+            if trace.profile:
+                try:
+                    await asyncio.to_thread(self.store.write, trace, scope["method"], scope["path"])
+                except OSError:
+                    logger.exception("Could not write request profile")
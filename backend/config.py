@@ -7,11 +7,15 @@ load_dotenv()
 class Config:
     # Gemini API
     GEMINI_API_KEY = os.getenv("GEMINI_API_KEY", "")
+    GEMINI_MODEL = os.getenv("GEMINI_MODEL", "gemini-2.5-flash")
     
     # Application
     APP_NAME = "SynapseMind Backend"
     APP_VERSION = "1.0.0"
     
+    # Build the Gemini model in the background right after startup
+    WARMUP_ON_STARTUP = os.getenv("WARMUP_ON_STARTUP", "1") == "1"
+    
     # CORS
     ALLOWED_ORIGINS = ["*"]  # Update for production
     
@@ -19,6 +23,68 @@ class Config:
     RATE_LIMIT_REQUESTS = 100
     RATE_LIMIT_PERIOD = 3600  # 1 hour
     
+    # Scheduler / admission control in front of the model
+    SCHEDULER_SLOTS = int(os.getenv("SCHEDULER_SLOTS", "1"))
+    SCHEDULER_MAX_QUEUE = int(os.getenv("SCHEDULER_MAX_QUEUE", "64"))
+    # Seconds a caller is willing to wait before we answer 429
+    SCHEDULER_DEADLINES = {
+        "interactive": float(os.getenv("DEADLINE_INTERACTIVE", "90")),
+        "bulk": float(os.getenv("DEADLINE_BULK", "1800")),
+        "probe": float(os.getenv("DEADLINE_PROBE", "5")),
+    }
+    # "client-a:2,client-b:0.5" -> share of the slots within a priority class
+    SCHEDULER_CLIENT_WEIGHTS = {
+        name.strip(): float(weight)
+        for name, weight in (
+            item.split(":", 1)
+            for item in os.getenv("SCHEDULER_CLIENT_WEIGHTS", "").split(",")
+            if ":" in item
+        )
+    }
+    
+    # Result cache shared by endpoints and background jobs
+    RESULT_CACHE_MAX_ENTRIES = int(os.getenv("RESULT_CACHE_MAX_ENTRIES", "1024"))
+    RESULT_CACHE_TTL = float(os.getenv("RESULT_CACHE_TTL", "3600"))
+    
+    # Largest request body accepted after decompression (413 above it)
+    INGEST_MAX_BYTES = int(os.getenv("INGEST_MAX_BYTES", str(4 * 1024 * 1024)))
+    
+    # Background jobs for long documents
+    JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+    JOB_MAX_PENDING = int(os.getenv("JOB_MAX_PENDING", "16"))
+    JOB_CHUNK_CHARS = int(os.getenv("JOB_CHUNK_CHARS", "24000"))  # ~6000 tokens
+    # Job status is shared by all workers on the host through a SQLite
+    # file, so polls routed to any worker find the job
+    JOB_STORE_PATH = os.getenv("JOB_STORE_PATH", "")  # default: <tmp>/synapsemind-jobs.sqlite3
+    JOB_RETENTION = float(os.getenv("JOB_RETENTION", "3600"))
+    
+    # Upstream quota, shared by all workers on the host through a SQLite
+    # ledger. Workers lease budget in batches; 0 disables a limit
+    QUOTA_DB_PATH = os.getenv("QUOTA_DB_PATH", "")  # default: <tmp>/synapsemind-quota.sqlite3
+    QUOTA_REQUESTS_PER_MINUTE = int(os.getenv("QUOTA_REQUESTS_PER_MINUTE", "1"))
+    QUOTA_TOKENS_PER_MINUTE = int(os.getenv("QUOTA_TOKENS_PER_MINUTE", "0"))
+    QUOTA_REQUESTS_PER_DAY = int(os.getenv("QUOTA_REQUESTS_PER_DAY", "250000"))
+    QUOTA_LEASE_REQUESTS = int(os.getenv("QUOTA_LEASE_REQUESTS", "2"))
+    QUOTA_LEASE_TOKENS = int(os.getenv("QUOTA_LEASE_TOKENS", "20000"))
+    # Longest a call sleeps for budget; beyond it the request gets a 429
+    QUOTA_MAX_WAIT = float(os.getenv("QUOTA_MAX_WAIT", "60"))
+    
+    # How shorter summary levels are derived from a cached academic one:
+    # "local" = extractive, "model" = one small prompt without the source
+    # text, spending a quota request (local while the quota is not free)
+    SUMMARY_DERIVE_MODE = os.getenv("SUMMARY_DERIVE_MODE", "local")
+    
+    # Upper bound on nodes when per-chunk mind maps are merged
+    MINDMAP_MERGE_MAX_NODES = int(os.getenv("MINDMAP_MERGE_MAX_NODES", "80"))
+    # Most nodes a client may ask /api/mindmap/merge for
+    MINDMAP_MERGE_NODE_LIMIT = int(os.getenv("MINDMAP_MERGE_NODE_LIMIT", "300"))
+    
+    # On-demand profiling: send X-Profile: trace|profile with
+    # X-Profile-Token, or flip it globally via POST /admin/profiling
+    PROFILING_TOKEN = os.getenv("PROFILING_TOKEN", "")
+    PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")
+    PROFILE_KEEP = int(os.getenv("PROFILE_KEEP", "50"))
+    
     @classmethod
     def validate_config(cls):
         """Validate critical configuration"""
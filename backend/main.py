@@ -1,57 +1,108 @@
 # backend/main.py - UPDATED WITH GEMINI INTEGRATION
-from fastapi import FastAPI, HTTPException
-from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+import asyncio
+import json
+import logging
+import math
 import os
-from dotenv import load_dotenv
+import time
+from contextlib import asynccontextmanager
 from datetime import datetime, timedelta
+from typing import Optional
 
-# Load environment variables
-load_dotenv()
-
-# Try to import Gemini service
-try:
-    from  services.gemini_service  import GeminiService
-    gemini_service = GeminiService(model_name="gemini-2.5-flash")
-    print("✅ Gemini Service initialized successfully")
-except ImportError as e:
-    print(f"⚠️  Could not import Gemini service: {e}")
-    gemini_service = None
-except Exception as e:
-    print(f"⚠️  Failed to initialize Gemini: {e}")
-    gemini_service = None
-
-app = FastAPI(
-    title="SynapseMind Backend API",
-    description="AI-powered summary and mind map generation",
-    version="1.0.0"
-)
+from fastapi import APIRouter, Depends, FastAPI, Header, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
 
-# Configure CORS - CRITICAL for Chrome extension
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],  # For development - restrict in production
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+from api.compression import CompressionMiddleware
+from api.encoding import COMPACT_MEDIA_TYPE, FastJSONResponse, encode_compact_mindmap, wants_compact
+from api.ingest import json_body, json_body_openapi, text_body, text_body_openapi
+from api.models import (
+    JobRequest, LookupRequest, MindMapMergeRequest, MindMapRequest, MindMapResponse,
+    ProfilingSettings, SummaryRequest
 )
+from api.tracing import PROFILING_MODES, ProfilingControl, TracingMiddleware
+from config import Config
+from services.extractive import compress_to_level
+from services.gemini_service import GeminiService
+from services.job_store import JobStore
+from services.jobs import JobManager, JobQueueFull
+from services.layout import LAYOUTS, apply_layout
+from services.mindmap_merge import merge_mindmaps
+from services.quota import QuotaExhausted
+from services.registry import LazyService
+from services.result_cache import MINDMAP_VARIANT, ResultCache, content_hash
+from services.scheduler import PRIORITY_CLASSES, PriorityScheduler, SchedulerRejected
+from services.tracing import ProfileStore, bind_to_request, record_span
 
-# Data models
-class SummaryRequest(BaseModel):
-    text: str
-    level: str = "quick"  # quick, detailed, academic
+logger = logging.getLogger("synapsemind")
 
-class MindMapRequest(BaseModel):
-    text: str
+router = APIRouter()
 
+# Data models
 class HealthResponse(BaseModel):
     status: str
     version: str
     service: str
     gemini_ready: bool = False
+    gemini_error: Optional[str] = None
+
+def get_gemini(request: Request) -> Optional[GeminiService]:
+    """The app's Gemini service, built on first use; None if it failed to build"""
+    return request.app.state.gemini.get()
+
+def require_gemini(request: Request) -> GeminiService:
+    gemini_service = get_gemini(request)
+    if not gemini_service:
+        raise HTTPException(
+            status_code=503,
+            detail="Gemini service not available. Check backend logs."
+        )
+    return gemini_service
+
+def _schedule_params(request: Request, default_priority: str = "interactive"):
+    """
+    Read scheduling hints from headers:
+    X-Priority (interactive/bulk/probe), X-Client-Id, X-Deadline-Ms
+    """
+    priority = request.headers.get("x-priority", default_priority).lower()
+    if priority not in PRIORITY_CLASSES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid priority. Use: {', '.join(PRIORITY_CLASSES)}"
+        )
+
+    client_id = request.headers.get("x-client-id") or (
+        request.client.host if request.client else "anonymous"
+    )
+
+    deadline = None
+    deadline_ms = request.headers.get("x-deadline-ms")
+    if deadline_ms:
+        try:
+            deadline = max(0.0, float(deadline_ms) / 1000)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="X-Deadline-Ms must be a number")
+
+    return priority, client_id, deadline
+
+async def run_scheduled(request: Request, func, *args, default_priority: str = "interactive"):
+    """Run a blocking Gemini call once the scheduler grants a slot"""
+    priority, client_id, deadline = _schedule_params(request, default_priority)
+    try:
+        async with request.app.state.scheduler.slot(priority, client_id, deadline) as ticket:
+            record_span("queue", time.monotonic() - ticket.enqueued_at)
+            return await run_in_threadpool(bind_to_request(func), *args)
+    except (SchedulerRejected, QuotaExhausted) as e:
+        raise HTTPException(
+            status_code=429,
+            detail=f"Server busy: {e.reason}",
+            headers={"Retry-After": str(max(1, math.ceil(e.retry_after)))}
+        )
 
 # Health check endpoint
-@app.get("/")
+@router.get("/")
 async def root():
     return {
         "message": "SynapseMind Backend API",
@@ -60,126 +111,355 @@ async def root():
             "health": "/health",
             "summary": "/api/summary (POST)",
             "mindmap": "/api/mindmap (POST)",
+            "merge": "/api/mindmap/merge (POST)",
+            "lookup": "/api/lookup (POST)",
             "usage": "/api/usage",
+            "jobs": "/api/jobs (POST), /api/jobs/{id}, /api/jobs/{id}/events",
             "test": "/api/test",
             "docs": "/docs"
         }
     }
 
-@app.get("/health")
-async def health_check():
+@router.get("/health")
+async def health_check(request: Request):
+    gemini_service = await run_in_threadpool(get_gemini, request)
     gemini_ready = gemini_service is not None
     if gemini_service:
-        gemini_ready = gemini_service.test_connection()
-    
+        try:
+            gemini_ready = await run_scheduled(
+                request, gemini_service.test_connection, default_priority="probe"
+            )
+        except HTTPException as e:
+            if e.status_code != 429:
+                raise
+            # Too busy to probe upstream; the service itself is up
+            gemini_ready = True
+
     return HealthResponse(
         status="healthy",
         version="1.0.0",
         service="synapsemind-backend",
-        gemini_ready=gemini_ready
+        gemini_ready=gemini_ready,
+        gemini_error=request.app.state.gemini.error
     )
 
-@app.get("/api/usage")
-async def get_usage_stats():
+@router.get("/api/usage")
+async def get_usage_stats(request: Request):
     """Get current API usage statistics"""
+    gemini_service = get_gemini(request)
     if gemini_service:
         stats = gemini_service.get_usage_stats()
+        remaining = stats["remaining_today"]
         return {
             "status": "success",
             "stats": stats,
-            "message": f"You have {stats['remaining_today']:,} requests left today"
+            "scheduler": request.app.state.scheduler.get_stats(),
+            "jobs": request.app.state.jobs.get_stats(),
+            "result_cache": request.app.state.result_cache.get_stats(),
+            "message": (
+                f"You have {remaining:,} requests left today"
+                if remaining is not None else "No daily request limit"
+            )
         }
     return {"status": "error", "message": "Gemini service not available"}
 
-# REAL SUMMARY ENDPOINT
-@app.post("/api/summary")
-async def generate_summary(request: SummaryRequest):
-    """Generate AI summary using Gemini"""
-    if not gemini_service:
+def _mindmap_variant(layout: Optional[str]) -> str:
+    if layout is None:
+        return MINDMAP_VARIANT
+    if layout not in LAYOUTS:
+        raise HTTPException(status_code=400, detail=f"Invalid layout. Use: {', '.join(LAYOUTS)}")
+    return f"layout={layout}"
+
+async def _with_layout(result_cache: ResultCache, digest: str, result: dict, layout: Optional[str]) -> dict:
+    """Lay out a mind map once and cache it next to the plain map"""
+    if layout is None:
+        return result
+    laid_out = await run_in_threadpool(bind_to_request(apply_layout), result, layout)
+    result_cache.put("mindmap", digest, _mindmap_variant(layout), laid_out)
+    return laid_out
+
+SUMMARY_LEVELS = ["quick", "detailed", "academic"]
+
+def _summary_payload(result: dict, cached: bool) -> dict:
+    return {
+        "status": "success",
+        "summary": result["summary"],
+        "level": result["level"],
+        "characters_processed": result["characters_processed"],
+        "cached": cached,
+        "timestamp": datetime.now().isoformat()
+    }
+
+async def _derive_levels(http_request: Request, gemini_service: GeminiService,
+                         digest: str, source: dict, levels: list) -> dict:
+    """
+    Shorter summaries from a cached academic one, without re-sending the
+    source text: a local extractive pass, or one small prompt
+    """
+    # Don't hold a slot waiting for quota just to shorten a summary
+    if Config.SUMMARY_DERIVE_MODE == "local" or gemini_service.seconds_until_ready() > 0:
+        derived = {level: compress_to_level(source["summary"], level) for level in levels}
+    else:
+        derived = await run_scheduled(
+            http_request, gemini_service.derive_summaries, source["summary"], levels
+        )
+
+    results = {}
+    for level in levels:
+        result = {
+            "summary": derived[level],
+            "level": level,
+            "characters_processed": source["characters_processed"],
+            "derived_from": "academic"
+        }
+        http_request.app.state.result_cache.put("summary", digest, level, result)
+        results[level] = result
+    return results
+
+def _mindmap_payload(result: dict, http_request: Request, format: str, cached: bool):
+    nodes = result.get("nodes", [])
+    edges = result.get("edges", [])
+
+    if wants_compact(format, http_request.headers.get("accept", "")):
+        return FastJSONResponse(
+            {
+                "status": "success",
+                **encode_compact_mindmap(nodes, edges),
+                "total_concepts": len(nodes),
+                "cached": cached,
+                "timestamp": datetime.now().isoformat()
+            },
+            media_type=COMPACT_MEDIA_TYPE
+        )
+
+    return {
+        "status": "success",
+        "nodes": nodes,
+        "edges": edges,
+        "total_concepts": len(nodes),
+        "cached": cached,
+        "timestamp": datetime.now().isoformat()
+    }
+
+# HASH-FIRST LOOKUP
+@router.post("/api/lookup")
+async def lookup_result(
+    request: LookupRequest,
+    http_request: Request,
+    format: str = Query("full", pattern="^(full|compact)$")
+):
+    """
+    Return a cached summary or mind map by content hash so clients can skip
+    uploading text the server has already processed. The hash is the sha256
+    hex digest of the UTF-8 text after normalize_text(). On a miss, POST the
+    full text to /api/summary or /api/mindmap.
+    """
+    if request.kind not in ["summary", "mindmap"]:
+        raise HTTPException(status_code=400, detail="Invalid kind. Use: summary or mindmap")
+
+    if request.kind == "summary" and request.level not in SUMMARY_LEVELS:
         raise HTTPException(
-            status_code=503, 
-            detail="Gemini service not available. Check backend logs."
+            status_code=400,
+            detail="Invalid level. Use: quick, detailed, or academic"
         )
-    
+
+    result_cache = http_request.app.state.result_cache
+    digest = request.hash.lower()
+
+    if request.kind == "summary":
+        result = result_cache.get("summary", digest, request.level)
+        if result is None:
+            return {"status": "miss", "kind": request.kind, "hash": digest}
+        return _summary_payload(result, cached=True)
+
+    result = result_cache.get("mindmap", digest, _mindmap_variant(request.layout))
+    if result is None and request.layout:
+        # The map may be cached without this layout; positions are cheap to add
+        base = result_cache.get("mindmap", digest, MINDMAP_VARIANT)
+        if base is not None:
+            result = await _with_layout(result_cache, digest, base, request.layout)
+    if result is None:
+        return {"status": "miss", "kind": request.kind, "hash": digest}
+    return _mindmap_payload(result, http_request, format, cached=True)
+
+# Text endpoints take JSON or text/plain bodies, optionally gzip/zstd
+# compressed, decoded in one streaming pass under INGEST_MAX_BYTES
+summary_body = text_body(SummaryRequest, Config.INGEST_MAX_BYTES)
+mindmap_body = text_body(MindMapRequest, Config.INGEST_MAX_BYTES)
+job_body = text_body(JobRequest, Config.INGEST_MAX_BYTES)
+merge_body = json_body(MindMapMergeRequest, Config.INGEST_MAX_BYTES)
+
+# REAL SUMMARY ENDPOINT
+@router.post("/api/summary", openapi_extra=text_body_openapi(SummaryRequest))
+async def generate_summary(
+    http_request: Request,
+    request: SummaryRequest = Depends(summary_body),
+    gemini_service: GeminiService = Depends(require_gemini)
+):
+    """Generate AI summary using Gemini"""
     # Validate input
     if not request.text or len(request.text.strip()) < 10:
         raise HTTPException(
-            status_code=400, 
+            status_code=400,
             detail="Text too short. Please provide at least 10 characters."
         )
-    
-    if request.level not in ["quick", "detailed", "academic"]:
+
+    if request.level not in SUMMARY_LEVELS:
         raise HTTPException(
-            status_code=400, 
+            status_code=400,
             detail="Invalid level. Use: quick, detailed, or academic"
         )
-    
+
+    result_cache = http_request.app.state.result_cache
+    digest = content_hash(request.text)
+    cached = {level: result_cache.get("summary", digest, level) for level in SUMMARY_LEVELS}
+    if cached[request.level] is not None and not request.all_levels:
+        return _summary_payload(cached[request.level], cached=True)
+
     try:
-        print(f"📝 Generating {request.level} summary for {len(request.text)} chars")
-        
-        # Call Gemini service
-        summary = gemini_service.generate_summary(request.text, request.level)
-        
-        return {
-            "status": "success",
-            "summary": summary,
-            "level": request.level,
-            "characters_processed": len(request.text),
-            "timestamp": datetime.now().isoformat()
-        }
-        
+        results = {level: result for level, result in cached.items() if result is not None}
+
+        # Only a full-text call when there is no academic summary to derive from
+        # (or the caller asked for the academic level itself)
+        if "academic" not in results or request.level == "academic":
+            level = "academic" if request.all_levels else request.level
+            if level not in results:
+                print(f"📝 Generating {level} summary for {len(request.text)} chars")
+
+                # Call Gemini service
+                summary = await run_scheduled(
+                    http_request, gemini_service.generate_summary, request.text, level
+                )
+
+                results[level] = {
+                    "summary": summary,
+                    "level": level,
+                    "characters_processed": len(request.text)
+                }
+                result_cache.put("summary", digest, level, results[level])
+
+        # Shorter levels come from the academic summary, not the source text
+        wanted = SUMMARY_LEVELS if request.all_levels else [request.level]
+        missing = [level for level in wanted if level not in results]
+        if missing and "academic" in results:
+            results.update(await _derive_levels(
+                http_request, gemini_service, digest, results["academic"], missing
+            ))
+
+        payload = _summary_payload(
+            results[request.level], cached=cached[request.level] is not None
+        )
+        if request.all_levels:
+            payload["summaries"] = {level: results[level]["summary"] for level in SUMMARY_LEVELS}
+        return payload
+
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"❌ Summary generation error: {e}")
         raise HTTPException(
-            status_code=500, 
+            status_code=500,
             detail=f"Failed to generate summary: {str(e)}"
         )
 
 # REAL MIND MAP ENDPOINT
-@app.post("/api/mindmap")
-async def generate_mindmap(request: MindMapRequest):
-    """Generate AI mind map using Gemini"""
-    if not gemini_service:
-        raise HTTPException(
-            status_code=503, 
-            detail="Gemini service not available. Check backend logs."
-        )
-    
+@router.post(
+    "/api/mindmap",
+    response_model=MindMapResponse,
+    response_model_exclude_none=True,
+    openapi_extra=text_body_openapi(MindMapRequest),
+)
+async def generate_mindmap(
+    http_request: Request,
+    request: MindMapRequest = Depends(mindmap_body),
+    format: str = Query("full", pattern="^(full|compact)$"),
+    gemini_service: GeminiService = Depends(require_gemini)
+):
+    """
+    Generate AI mind map using Gemini.
+    Pass ?format=compact (or Accept: application/vnd.synapsemind.columnar+json)
+    for the columnar encoding.
+    """
     # Validate input
     if not request.text or len(request.text.strip()) < 20:
         raise HTTPException(
-            status_code=400, 
+            status_code=400,
             detail="Text too short for mind map. Please provide at least 20 characters."
         )
-    
+
+    result_cache = http_request.app.state.result_cache
+    digest = content_hash(request.text)
+    cached = result_cache.get("mindmap", digest, _mindmap_variant(request.layout))
+    if cached is None and request.layout:
+        base = result_cache.get("mindmap", digest, MINDMAP_VARIANT)
+        if base is not None:
+            cached = await _with_layout(result_cache, digest, base, request.layout)
+    if cached is not None:
+        return _mindmap_payload(cached, http_request, format, cached=True)
+
     try:
         print(f"🗺️ Generating mind map for {len(request.text)} chars")
-        
+
         # Call Gemini service
-        mindmap = gemini_service.generate_mindmap(request.text)
-        
-        return {
-            "status": "success",
+        mindmap = await run_scheduled(http_request, gemini_service.generate_mindmap, request.text)
+        result = {
             "nodes": mindmap.get("nodes", []),
-            "edges": mindmap.get("edges", []),
-            "total_concepts": len(mindmap.get("nodes", [])),
-            "timestamp": datetime.now().isoformat()
+            "edges": mindmap.get("edges", [])
         }
-        
+        # Don't pin a fallback map in the cache; the next request may succeed
+        if mindmap.get("status") != "fallback":
+            result_cache.put("mindmap", digest, MINDMAP_VARIANT, result)
+            result = await _with_layout(result_cache, digest, result, request.layout)
+        elif request.layout:
+            result = await run_in_threadpool(bind_to_request(apply_layout), result, request.layout)
+        return _mindmap_payload(result, http_request, format, cached=False)
+
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"❌ Mind map generation error: {e}")
         raise HTTPException(
-            status_code=500, 
+            status_code=500,
             detail=f"Failed to generate mind map: {str(e)}"
         )
 
+@router.post(
+    "/api/mindmap/merge",
+    response_model=MindMapResponse,
+    response_model_exclude_none=True,
+    openapi_extra=json_body_openapi(MindMapMergeRequest),
+)
+async def merge_mindmap(
+    http_request: Request,
+    request: MindMapMergeRequest = Depends(merge_body),
+    format: str = Query("full", pattern="^(full|compact)$")
+):
+    """
+    Combine several mind maps (e.g. one per selection or per chunk) into
+    one, deduplicating concepts and pruning to max_nodes. No Gemini call.
+    """
+    if not request.maps:
+        raise HTTPException(status_code=400, detail="Provide at least one mind map to merge.")
+    _mindmap_variant(request.layout)
+
+    graphs = [graph.model_dump(exclude_none=True) for graph in request.maps]
+    merged = await run_in_threadpool(
+        bind_to_request(merge_mindmaps), graphs, request.max_nodes
+    )
+    if request.layout:
+        merged = await run_in_threadpool(bind_to_request(apply_layout), merged, request.layout)
+    return _mindmap_payload(merged, http_request, format, cached=False)
+
 # Test endpoint for quick checks
-@app.post("/api/test")
-async def test_api(text: str = "AI is transforming education through personalized learning."):
+@router.post("/api/test")
+async def test_api(request: Request, text: str = "AI is transforming education through personalized learning."):
     """Quick test endpoint"""
+    gemini_service = get_gemini(request)
     if gemini_service:
         try:
-            summary = gemini_service.generate_summary(text, "quick")
+            summary = await run_scheduled(
+                request, gemini_service.generate_summary, text, "quick", default_priority="probe"
+            )
             return {
                 "test": "passed",
                 "summary": summary,
@@ -188,42 +468,262 @@ async def test_api(text: str = "AI is transforming education through personalize
             }
         except Exception as e:
             return {
-                "test": "failed", 
+                "test": "failed",
                 "error": str(e),
                 "service": "error"
             }
-    
+
     return {
-        "test": "failed", 
+        "test": "failed",
         "error": "service not available",
         "service": "inactive"
     }
 
-# Simple cache for demo
-demo_cache = {}
-
-@app.post("/api/summary/cached")
-async def cached_summary(request: SummaryRequest):
+@router.post("/api/summary/cached", openapi_extra=text_body_openapi(SummaryRequest))
+async def cached_summary(
+    http_request: Request,
+    request: SummaryRequest = Depends(summary_body),
+    gemini_service: GeminiService = Depends(require_gemini)
+):
     """
     Cached summary endpoint - good for demo to avoid rate limits
     """
+    demo_cache = http_request.app.state.demo_cache
     cache_key = f"{hash(request.text[:100])}_{request.level}"
-    
+
     # Check cache (valid for 1 hour)
     if cache_key in demo_cache:
         cache_time, cached_data = demo_cache[cache_key]
         if datetime.now() - cache_time < timedelta(hours=1):
             return {**cached_data, "cached": True, "cache_time": cache_time.isoformat()}
-    
+
     # Generate fresh if not cached
-    result = await generate_summary(request)
+    result = await generate_summary(http_request, request, gemini_service)
     demo_cache[cache_key] = (datetime.now(), result)
-    
+
     return {**result, "cached": False, "cache_time": datetime.now().isoformat()}
 
+# BACKGROUND JOBS FOR LONG DOCUMENTS
+@router.post("/api/jobs", status_code=202, openapi_extra=text_body_openapi(JobRequest))
+async def create_job(http_request: Request, request: JobRequest = Depends(job_body)):
+    """
+    Queue a long document for background processing and return a job id
+    right away. Poll /api/jobs/{id} or stream /api/jobs/{id}/events.
+    """
+    if request.kind not in ["summary", "mindmap"]:
+        raise HTTPException(status_code=400, detail="Invalid kind. Use: summary or mindmap")
+
+    if request.level not in SUMMARY_LEVELS:
+        raise HTTPException(
+            status_code=400,
+            detail="Invalid level. Use: quick, detailed, or academic"
+        )
+
+    if not request.text or len(request.text.strip()) < 10:
+        raise HTTPException(
+            status_code=400,
+            detail="Text too short. Please provide at least 10 characters."
+        )
+
+    _, client_id, _ = _schedule_params(http_request, "bulk")
+    try:
+        job = http_request.app.state.jobs.submit(
+            request.text, request.level, request.kind, client_id
+        )
+    except JobQueueFull as e:
+        raise HTTPException(
+            status_code=429,
+            detail="Too many pending jobs. Try again later.",
+            headers={"Retry-After": str(max(1, math.ceil(e.retry_after)))}
+        )
+    await http_request.app.state.jobs.flush()
+
+    return {
+        **job.snapshot(),
+        "status_url": f"/api/jobs/{job.id}",
+        "events_url": f"/api/jobs/{job.id}/events"
+    }
+
+async def _get_job(request: Request, job_id: str) -> dict:
+    # Any worker can answer: jobs owned by another one come from the shared store
+    snapshot = await request.app.state.jobs.lookup(job_id)
+    if snapshot is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return snapshot
+
+@router.get("/api/jobs/{job_id}")
+async def get_job(job_id: str, request: Request):
+    """Job status and progress; includes the result once done"""
+    return await _get_job(request, job_id)
+
+@router.get("/api/jobs/{job_id}/events")
+async def job_events(job_id: str, request: Request):
+    """Server-sent events: one `progress` event per change, then `done`/`failed`"""
+    await _get_job(request, job_id)
+    jobs = request.app.state.jobs
+
+    async def event_stream():
+        async for snapshot in jobs.watch(job_id):
+            if await request.is_disconnected():
+                return
+            if snapshot is None:
+                yield ": keepalive\n\n"
+                continue
+            event = snapshot["status"] if snapshot["status"] in ("done", "failed") else "progress"
+            yield f"event: {event}\ndata: {json.dumps(snapshot)}\n\n"
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+# ADMIN: ON-DEMAND PROFILING
+def require_admin(request: Request, x_admin_token: Optional[str] = Header(None)):
+    if not request.app.state.profiling.authorized(x_admin_token):
+        raise HTTPException(status_code=403, detail="Admin token required")
+
+@router.get("/admin/profiling", dependencies=[Depends(require_admin)])
+async def get_profiling(request: Request):
+    """Current profiling mode and the newest saved profiles"""
+    control = request.app.state.profiling
+    store = request.app.state.profile_store
+    profiles = []
+    if os.path.isdir(store.directory):
+        profiles = sorted(f for f in os.listdir(store.directory) if f.endswith(".prof"))[-20:]
+    return {
+        "mode": control.mode,
+        "sample_rate": control.sample_rate,
+        "profile_dir": store.directory,
+        "profiles": profiles
+    }
+
+@router.post("/admin/profiling", dependencies=[Depends(require_admin)])
+async def set_profiling(settings: ProfilingSettings, request: Request):
+    """Switch tracing/profiling for live traffic without a redeploy"""
+    if settings.mode not in PROFILING_MODES:
+        raise HTTPException(status_code=400, detail=f"Invalid mode. Use: {', '.join(PROFILING_MODES)}")
+    if not 0.0 <= settings.sample_rate <= 1.0:
+        raise HTTPException(status_code=400, detail="sample_rate must be between 0 and 1")
+
+    control = request.app.state.profiling
+    control.mode = settings.mode
+    control.sample_rate = settings.sample_rate
+    logger.info("Profiling set to %s (sample rate %.2f)", control.mode, control.sample_rate)
+    return {"status": "success", "mode": control.mode, "sample_rate": control.sample_rate}
+
+def build_gemini() -> GeminiService:
+    """
+    Default Gemini factory. The SDK import and model construction happen
+    here, inside LazyService, so a failure is recorded (and shown by
+    /health) instead of surfacing later in the middle of a request.
+    """
+    gemini_service = GeminiService(model_name=Config.GEMINI_MODEL)
+    gemini_service.warm_up()
+    return gemini_service
+
+def warm_up(app: FastAPI):
+    """Build the Gemini backend (SDK import + model) before the first request"""
+    app.state.gemini.get()
+
+def _log_warmup_result(task: asyncio.Task):
+    if not task.cancelled() and task.exception() is not None:
+        logger.error("Gemini warm-up failed: %s", task.exception())
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    Config.validate_config()
+
+    # Warm up in the background so the worker starts accepting traffic at once
+    warmup_task = None
+    if app.state.warmup:
+        warmup_task = asyncio.create_task(run_in_threadpool(warm_up, app))
+        warmup_task.add_done_callback(_log_warmup_result)
+
+    await app.state.jobs.start()
+
+    yield
+
+    await app.state.jobs.stop()
+    if warmup_task and not warmup_task.done():
+        warmup_task.cancel()
+
+def create_app(gemini_factory=None, warmup: Optional[bool] = None) -> FastAPI:
+    """
+    Build the FastAPI app. Backends are created lazily on first use, so
+    constructing the app does not import the Gemini SDK or touch the network.
+    """
+    app = FastAPI(
+        title="SynapseMind Backend API",
+        description="AI-powered summary and mind map generation",
+        version="1.0.0",
+        default_response_class=FastJSONResponse,
+        lifespan=lifespan
+    )
+
+    gemini = LazyService("gemini", gemini_factory or build_gemini)
+
+    def ready_delay() -> float:
+        gemini_service = gemini.peek()
+        return gemini_service.seconds_until_ready() if gemini_service else 0.0
+
+    app.state.gemini = gemini
+    app.state.warmup = Config.WARMUP_ON_STARTUP if warmup is None else warmup
+    # All upstream calls go through one scheduler so interactive requests
+    # are not stuck behind bulk work
+    app.state.scheduler = PriorityScheduler(
+        slots=Config.SCHEDULER_SLOTS,
+        max_queue=Config.SCHEDULER_MAX_QUEUE,
+        default_deadlines=Config.SCHEDULER_DEADLINES,
+        client_weights=Config.SCHEDULER_CLIENT_WEIGHTS,
+        ready_delay=ready_delay,
+    )
+    app.state.result_cache = ResultCache(
+        max_entries=Config.RESULT_CACHE_MAX_ENTRIES,
+        ttl_seconds=Config.RESULT_CACHE_TTL,
+    )
+    app.state.jobs = JobManager(
+        app.state.scheduler,
+        gemini.get,
+        app.state.result_cache,
+        workers=Config.JOB_WORKERS,
+        max_pending=Config.JOB_MAX_PENDING,
+        chunk_chars=Config.JOB_CHUNK_CHARS,
+        merge_max_nodes=Config.MINDMAP_MERGE_MAX_NODES,
+        store=JobStore.from_config(),
+    )
+    # Simple cache for demo
+    app.state.demo_cache = {}
+    app.state.profiling = ProfilingControl(token=Config.PROFILING_TOKEN)
+    app.state.profile_store = ProfileStore(Config.PROFILE_DIR, keep=Config.PROFILE_KEEP)
+
+    # Configure CORS - CRITICAL for Chrome extension
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=Config.ALLOWED_ORIGINS,  # For development - restrict in production
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
+
+    # Mind maps repeat the same keys and strings on every node, so they
+    # compress very well
+    app.add_middleware(CompressionMiddleware, minimum_size=500)
+
+    # Opt-in Server-Timing spans and cProfile dumps for slow requests
+    app.add_middleware(
+        TracingMiddleware,
+        control=app.state.profiling,
+        store=app.state.profile_store
+    )
+
+    app.include_router(router)
+    return app
+
+app = create_app()
+
 if __name__ == "__main__":
     import uvicorn
-    import os
 
     port = int(os.getenv("PORT", 8000))
 
@@ -232,5 +732,5 @@ if __name__ == "__main__":
     print(f"📡 Port: {port}")
     print(f"📚 API Documentation: http://localhost:{port}/docs")
     print(f"🏥 Health check: http://localhost:{port}/health")
-    
-    uvicorn.run(app, host="0.0.0.0", port=port)
\ No newline at end of file
+
+    uvicorn.run(app, host="0.0.0.0", port=port)
@@ -0,0 +1,35 @@
+# backend/services/chunking.py - Split long documents for per-chunk processing
+from typing import List
+
+# Same rough estimate GeminiService._clean_text uses: 1 token ≈ 4 characters
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    return max(1, len(text) // CHARS_PER_TOKEN)
+
+
+def split_into_chunks(text: str, max_chars: int = 24000) -> List[str]:
+    """
+    Split normalized text into chunks of at most max_chars, preferring to
+    cut at a sentence break in the last 30% of each window.
+    """
+    chunks = []
+    start = 0
+    length = len(text)
+
+    while start < length:
+        end = min(start + max_chars, length)
+        if end < length:
+            window = text[start:end]
+            for separator in ['. ', '? ', '! ', '; ']:
+                last_break = window.rfind(separator)
+                if last_break > max_chars * 0.7:
+                    end = start + last_break + len(separator)
+                    break
+        chunk = text[start:end].strip()
+        if chunk:
+            chunks.append(chunk)
+        start = end
+
+    return chunks
@@ -0,0 +1,54 @@
+# backend/services/extractive.py - Local extractive summary compressor
+import re
+from collections import Counter
+from typing import List
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+_WORD = re.compile(r"[A-Za-z][A-Za-z'-]+")
+_STOPWORDS = {
+    "a", "an", "the", "and", "or", "but", "in", "on", "at", "to", "for", "of",
+    "with", "by", "is", "are", "was", "were", "be", "been", "being", "have",
+    "has", "had", "do", "does", "did", "will", "would", "should", "could",
+    "can", "may", "might", "must", "this", "that", "these", "those", "it",
+    "its", "as", "from", "which", "also", "such", "their", "they", "there",
+}
+
+# How many sentences each level keeps when compressed locally
+LEVEL_SENTENCES = {"quick": 5, "detailed": 9}
+
+
+def split_sentences(text: str) -> List[str]:
+    # Drop markdown bullets/numbering so list items count as sentences
+    lines = [re.sub(r"^\s*(?:[-*•]|\d+[.)])\s*", "", line) for line in text.splitlines()]
+    sentences = []
+    for line in lines:
+        sentences.extend(s.strip() for s in _SENTENCE_END.split(line) if s.strip())
+    return sentences
+
+
+def compress(text: str, max_sentences: int) -> str:
+    """
+    Keep the max_sentences highest scoring sentences, in their original
+    order. A sentence scores the summed document frequency of its content
+    words over the square root of their count, so sentences about the
+    main themes win without simply favouring the longest ones.
+    """
+    sentences = split_sentences(text)
+    if len(sentences) <= max_sentences:
+        return " ".join(sentences)
+
+    words = [[w.lower() for w in _WORD.findall(s) if w.lower() not in _STOPWORDS] for s in sentences]
+    frequency = Counter(w for sentence in words for w in sentence)
+    top = max(frequency.values(), default=1)
+
+    def score(i: int) -> float:
+        if not words[i]:
+            return 0.0
+        return sum(frequency[w] / top for w in words[i]) / len(words[i]) ** 0.5
+
+    chosen = sorted(sorted(range(len(sentences)), key=score, reverse=True)[:max_sentences])
+    return " ".join(sentences[i] for i in chosen)
+
+
+def compress_to_level(summary: str, level: str) -> str:
+    return compress(summary, LEVEL_SENTENCES.get(level, LEVEL_SENTENCES["quick"]))
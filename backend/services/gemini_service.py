@@ -1,62 +1,77 @@
 # backend/services/gemini_service.py - SIMPLIFIED VERSION
-import google.generativeai as genai
 import json
-import os
+import logging
 import re
-import time
-from typing import Dict, Any, Optional
+import threading
+from typing import Dict, Any, List, Optional
 from datetime import datetime
-from dotenv import load_dotenv
 
-# Load environment variables directly
-load_dotenv()
-GEMINI_API_KEY = os.getenv("GEMINI_API_KEY", "")
+from config import Config
+from services.chunking import estimate_tokens
+from services.extractive import compress_to_level
+from services.quota import QuotaCoordinator
+from services.result_cache import normalize_text
+from services.tracing import span
 
-if not GEMINI_API_KEY:
-    print("⚠️  WARNING: GEMINI_API_KEY not found in environment")
+logger = logging.getLogger("synapsemind")
 
 class GeminiService:
-    def __init__(self, model_name: str = "gemini-2.5-flash"):
+    def __init__(self, model_name: str = "gemini-2.5-flash", api_key: Optional[str] = None,
+                 quota: Optional[QuotaCoordinator] = None):
         """
-        Initialize Gemini service
+        Initialize Gemini service. The SDK import and model construction are
+        deferred until the first call (or warm_up), so this is cheap.
         """
-        # Configure Gemini
-        genai.configure(api_key=GEMINI_API_KEY)
-        
         self.model_name = model_name
-        self.model = genai.GenerativeModel(model_name)
-        
-        # Rate limiting tracking
-        self.last_request_time = 0
-        self.request_count = 0
-        self.daily_limit = 250000
-        self.minute_limit = 1
+        self.api_key = Config.GEMINI_API_KEY if api_key is None else api_key
+        self._model = None
+        self._model_lock = threading.Lock()
         
-        print(f"✅ Gemini Service initialized")
-        print(f"   Model: {model_name}")
+        # Rate limits are shared with every other worker on this host
+        self.quota = quota or QuotaCoordinator.from_config(self.api_key)
     
-    def _check_rate_limit(self):
-        """Simple rate limiting"""
-        current_time = time.time()
-        time_since_last = current_time - self.last_request_time
-        
-        if time_since_last < 60:
-            wait_time = 60 - time_since_last
-            print(f"⏳ Waiting {wait_time:.1f}s due to rate limit")
-            time.sleep(wait_time)
-        
-        self.last_request_time = time.time()
-        self.request_count += 1
+    @property
+    def model(self):
+        """The Gemini model, created on first use"""
+        if self._model is None:
+            with self._model_lock:
+                if self._model is None:
+                    # Heavy import (grpc, protobuf); keep it off the startup path
+                    import google.generativeai as genai
+                    genai.configure(api_key=self.api_key)
+                    self._model = genai.GenerativeModel(self.model_name)
+                    logger.info("Gemini model %s ready", self.model_name)
+        return self._model
+    
+    def warm_up(self):
+        """Import the SDK and build the model ahead of the first request"""
+        return self.model is not None
     
+    def _check_rate_limit(self, tokens: int = 0):
+        """
+        Wait for one request (and ~tokens tokens) of the host-wide quota.
+        Raises QuotaExhausted instead of waiting longer than QUOTA_MAX_WAIT.
+        """
+        wait_time = self.quota.acquire(tokens)
+        if wait_time:
+            print(f"⏳ Waited {wait_time:.1f}s due to rate limit")
+
+    def seconds_until_ready(self) -> float:
+        """How long the next call would wait in _check_rate_limit"""
+        return self.quota.seconds_until_available()
+
     def generate_summary(self, text: str, level: str = "quick") -> str:
         """
         Generate summary
         """
+        # Outside the try: running out of quota is not a reason to fall back
+        with span("rate_limit_wait"):
+            self._check_rate_limit(estimate_tokens(text) + 1500)
+        
         try:
-            self._check_rate_limit()
-            
             # Clean text
-            text = self._clean_text(text)
+            with span("clean_text"):
+                text = self._clean_text(text)
             
              # Set appropriate token limits based on level
             token_limits = {
@@ -110,14 +125,15 @@ class GeminiService:
 
                         Ensure the summary is complete, coherent, and ends with a concluding statement."""
 
-            response = self.model.generate_content(
-                prompt,
-                generation_config={
-                    "max_output_tokens": token_limits[level],
-                    "temperature": 0.3,
-                    "top_p": 0.8
-                    }
-            )
+            with span("upstream"):
+                response = self.model.generate_content(
+                    prompt,
+                    generation_config={
+                        "max_output_tokens": token_limits[level],
+                        "temperature": 0.3,
+                        "top_p": 0.8
+                        }
+                )
             
             summary = response.text.strip()
             print(f"📊 Generated {level} summary ({len(summary)} chars, {len(summary.split())} words)")
@@ -140,15 +156,79 @@ class GeminiService:
         
             
         
+    def derive_summaries(self, source_summary: str, levels: List[str]) -> Dict[str, str]:
+        """
+        Condense an existing (academic) summary into shorter levels with one
+        small call. The original text is not sent again. Levels the model
+        doesn't return are compressed locally instead.
+        """
+        instructions = {
+            "detailed": "DETAILED: one comprehensive paragraph in complete, connected sentences, no bullet points",
+            "quick": "QUICK: a concise 5-6 sentence summary of the main subject and core finding",
+        }
+        wanted = [level for level in levels if level in instructions]
+        derived: Dict[str, str] = {}
+        
+        if wanted:
+            try:
+                with span("rate_limit_wait"):
+                    self._check_rate_limit(estimate_tokens(source_summary) + 1500)
+                
+                sections = "\n".join(instructions[level] for level in wanted)
+                prompt = f"""Rewrite the summary below at shorter lengths. Use only information it contains.
+
+                    Summary:
+                    {source_summary}
+
+                    Return exactly these sections, each starting on its own line with its label:
+                    {sections}"""
+                
+                with span("upstream"):
+                    response = self.model.generate_content(
+                        prompt,
+                        generation_config={
+                            "max_output_tokens": 1500,
+                            "temperature": 0.3,
+                            "top_p": 0.8
+                        }
+                    )
+                
+                with span("parse_levels"):
+                    derived = self._parse_level_sections(response.text, wanted)
+            except Exception as e:
+                print(f"❌ Level derivation error: {e}")
+        
+        for level in levels:
+            if not derived.get(level):
+                derived[level] = compress_to_level(source_summary, level)
+        return derived
+    
+    def _parse_level_sections(self, response_text: str, levels: List[str]) -> Dict[str, str]:
+        """Split a 'DETAILED: ... QUICK: ...' reply into one text per level"""
+        labels = "|".join(level.upper() for level in levels)
+        pattern = re.compile(rf"^[\s*#_]*({labels})[*_ ]*:[*_ ]*", re.MULTILINE | re.IGNORECASE)
+        
+        sections: Dict[str, str] = {}
+        matches = list(pattern.finditer(response_text))
+        for i, match in enumerate(matches):
+            end = matches[i + 1].start() if i + 1 < len(matches) else len(response_text)
+            body = response_text[match.end():end].strip()
+            if body:
+                sections[match.group(1).lower()] = body
+        return sections
+    
     def generate_mindmap(self, text: str) -> Dict[str, Any]:
         """
         Generate mind map with hierarchical structure from text
         """
+        # Outside the try: running out of quota is not a reason to fall back
+        with span("rate_limit_wait"):
+            self._check_rate_limit(estimate_tokens(text) + 2000)
+        
         try:
-            self._check_rate_limit()
-            
             # Clean text but keep more context
-            text = self._clean_text(text)
+            with span("clean_text"):
+                text = self._clean_text(text)
             
             prompt = f"""Analyze this text and extract key concepts to create a hierarchical mind map.
             
@@ -179,21 +259,24 @@ class GeminiService:
             
             Keep it structured but concise."""
             
-            response = self.model.generate_content(
-                prompt,
-                generation_config={
-                    "max_output_tokens": 2000,  # Increased for hierarchy
-                    "temperature": 0.3,
-                    "top_p": 0.9,
-                    "top_k": 40
-                }
-            )
+            with span("upstream"):
+                response = self.model.generate_content(
+                    prompt,
+                    generation_config={
+                        "max_output_tokens": 2000,  # Increased for hierarchy
+                        "temperature": 0.3,
+                        "top_p": 0.9,
+                        "top_k": 40
+                    }
+                )
             
             # Parse the structured response
-            mindmap_data = self._parse_structured_mindmap(response.text)
+            with span("parse_mindmap"):
+                mindmap_data = self._parse_structured_mindmap(response.text)
             
             # Build nodes and connections
-            return self._build_mindmap_structure(mindmap_data)
+            with span("build_mindmap"):
+                return self._build_mindmap_structure(mindmap_data)
             
         except Exception as e:
             print(f"❌ Mindmap generation error: {e}")
@@ -406,17 +489,16 @@ class GeminiService:
       if not text:
           return ""
       
-      text = ' '.join(text.split())
+      # No copy when the endpoint already normalized the text on ingestion
+      text = normalize_text(text)
       
       # Rough estimate: 1 token ≈ 4 characters for English
       max_chars = max_tokens * 4
       
       if len(text) > max_chars:
-          truncated = text[:max_chars]
-          
-          # Try to find a natural break
+          # Try to find a natural break (searching in place, no truncated copy)
           for separator in ['. ', '\n\n', '; ', '? ', '! ']:
-              last_break = truncated.rfind(separator)
+              last_break = text.rfind(separator, 0, max_chars)
               if last_break > max_chars * 0.7:  # If break is in last 30%
                   return text[:last_break + len(separator)] + "..."
           
@@ -492,25 +574,30 @@ class GeminiService:
             "edges": [
                 {"source": "1", "target": "2", "label": "includes"},
                 {"source": "1", "target": "3", "label": "relates"}
-            ]
+            ],
+            "status": "fallback"
         }
     
     def get_usage_stats(self) -> dict:
         """Get usage statistics"""
+        usage = self.quota.usage()
+        daily_limit = usage["requests_per_day"]
         return {
-            "requests_today": self.request_count,
-            "daily_limit": self.daily_limit,
-            "remaining_today": self.daily_limit - self.request_count,
+            "requests_today": usage["requests_today"],
+            "daily_limit": daily_limit,
+            "remaining_today": max(0, daily_limit - usage["requests_today"]) if daily_limit else None,
+            "requests_this_minute": usage["requests_this_minute"],
+            "minute_limit": usage["requests_per_minute"],
             "model": self.model_name
         }
     
     def test_connection(self) -> bool:
         """Test Gemini connection"""
+        if not self.api_key:
+            return False
+        
+        self._check_rate_limit(10)
         try:
-            if not GEMINI_API_KEY:
-                return False
-            
-            self._check_rate_limit()
             response = self.model.generate_content(
                 "Hello",
                 generation_config={"max_output_tokens": 10}
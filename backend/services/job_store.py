@@ -0,0 +1,75 @@
+# backend/services/job_store.py - Job status shared by every worker on the host
+import json
+import os
+import sqlite3
+import tempfile
+import time
+from typing import Any, Dict, Iterable, Optional
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id TEXT PRIMARY KEY,
+    updated_at REAL NOT NULL,
+    snapshot TEXT NOT NULL
+)
+"""
+
+
+class JobStore:
+    """
+    Latest snapshot of every job in a SQLite file that all uvicorn workers
+    on the host open. The worker running a job writes its progress here, so
+    a status poll or event stream routed to any other worker still finds
+    it. Snapshots are dropped `retention` seconds after their last update.
+    """
+
+    def __init__(self, path: str, retention: float = 3600.0):
+        self.path = path
+        self.retention = retention
+
+        with self._connect() as db:
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute(_SCHEMA)
+            db.execute("CREATE INDEX IF NOT EXISTS jobs_updated_at ON jobs (updated_at)")
+
+    @classmethod
+    def from_config(cls) -> "JobStore":
+        from config import Config
+
+        path = Config.JOB_STORE_PATH or os.path.join(tempfile.gettempdir(), "synapsemind-jobs.sqlite3")
+        return cls(path, retention=Config.JOB_RETENTION)
+
+    def _connect(self) -> sqlite3.Connection:
+        # Short-lived connections: sqlite3 objects can't be shared across threads
+        return sqlite3.connect(self.path, timeout=30, isolation_level=None)
+
+    def save(self, snapshots: Iterable[Dict[str, Any]]):
+        """Write the given job snapshots and drop expired ones"""
+        rows = [(s["job_id"], s["updated_at"], json.dumps(s)) for s in snapshots]
+        db = self._connect()
+        try:
+            db.execute("BEGIN IMMEDIATE")
+            # Writes can race; an older snapshot never replaces a newer one
+            db.executemany(
+                "INSERT INTO jobs (job_id, updated_at, snapshot) VALUES (?, ?, ?) "
+                "ON CONFLICT (job_id) DO UPDATE SET "
+                "updated_at = excluded.updated_at, snapshot = excluded.snapshot "
+                "WHERE excluded.updated_at >= jobs.updated_at",
+                rows,
+            )
+            db.execute("DELETE FROM jobs WHERE updated_at < ?", (time.time() - self.retention,))
+            db.execute("COMMIT")
+        except Exception:
+            if db.in_transaction:
+                db.execute("ROLLBACK")
+            raise
+        finally:
+            db.close()
+
+    def load(self, job_id: str) -> Optional[Dict[str, Any]]:
+        db = self._connect()
+        try:
+            row = db.execute("SELECT snapshot FROM jobs WHERE job_id=?", (job_id,)).fetchone()
+        finally:
+            db.close()
+        return json.loads(row[0]) if row else None
@@ -0,0 +1,394 @@
+# backend/services/jobs.py - Background jobs for documents too long for one request
+import asyncio
+import logging
+import sqlite3
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
+
+from services.chunking import estimate_tokens, split_into_chunks
+from services.job_store import JobStore
+from services.mindmap_merge import merge_mindmaps
+from services.quota import QuotaExhausted
+from services.result_cache import MINDMAP_VARIANT, ResultCache, content_hash, normalize_text
+from services.scheduler import PriorityScheduler, SchedulerRejected
+
+logger = logging.getLogger("synapsemind")
+
+TERMINAL_STATES = ("done", "failed")
+
+
+class JobQueueFull(Exception):
+    """Raised by submit() when the pending queue is at capacity"""
+
+    def __init__(self, retry_after: float):
+        super().__init__("Job queue is full")
+        self.retry_after = retry_after
+
+
+class Job:
+    def __init__(self, kind: str, level: str, text: str, client_id: str,
+                 on_change: Optional[Callable[["Job"], None]] = None):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.level = level
+        self.client_id = client_id
+        self.text = text
+        self.digest = content_hash(text, normalized=True)
+        # Same cache keys the /api/summary and /api/mindmap endpoints use
+        self.variant = level if kind == "summary" else MINDMAP_VARIANT
+        self.status = "queued"
+        self.stage = "queued"
+        self.chunks_total = 0
+        self.chunks_done = 0
+        self.tokens_used = 0
+        self.result: Optional[Dict[str, Any]] = None
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.updated_at = self.created_at
+        self._changed = asyncio.Event()
+        self._on_change = on_change
+
+    def touch(self, **fields):
+        """Update fields and wake everyone watching this job"""
+        for name, value in fields.items():
+            setattr(self, name, value)
+        self.updated_at = time.time()
+        changed, self._changed = self._changed, asyncio.Event()
+        changed.set()
+        if self._on_change is not None:
+            self._on_change(self)
+
+    def snapshot(self, include_result: bool = True) -> Dict[str, Any]:
+        data = {
+            "job_id": self.id,
+            "kind": self.kind,
+            "level": self.level,
+            "status": self.status,
+            "stage": self.stage,
+            "chunks_total": self.chunks_total,
+            "chunks_done": self.chunks_done,
+            "tokens_used": self.tokens_used,
+            "created_at": self.created_at,
+            "updated_at": self.updated_at,
+        }
+        if self.error:
+            data["error"] = self.error
+        if include_result and self.result is not None:
+            data["result"] = self.result
+        return data
+
+
+class JobManager:
+    """
+    Runs long documents through a pool of asyncio workers.
+
+    Each job is chunked, every chunk goes through the scheduler as bulk
+    work, and progress (chunks done, tokens used) is published to status
+    polls and SSE watchers. The pending queue is bounded so callers get
+    backpressure instead of an ever-growing backlog. Finished results are
+    written to the shared ResultCache.
+
+    Jobs run in the worker process that accepted them. With a JobStore,
+    every change is also written there, batched by a single writer task,
+    so lookup() and watch() work from any worker on the host.
+    """
+
+    def __init__(
+        self,
+        scheduler: PriorityScheduler,
+        get_service: Callable[[], Any],
+        cache: ResultCache,
+        workers: int = 2,
+        max_pending: int = 16,
+        chunk_chars: int = 24000,
+        max_jobs_kept: int = 200,
+        merge_max_nodes: int = 80,
+        store: Optional[JobStore] = None,
+    ):
+        self.scheduler = scheduler
+        self.get_service = get_service
+        self.cache = cache
+        self.workers = workers
+        self.chunk_chars = chunk_chars
+        self.max_jobs_kept = max_jobs_kept
+        self.merge_max_nodes = merge_max_nodes
+        self._queue: Optional[asyncio.Queue] = None
+        self._max_pending = max_pending
+        self._tasks: List[asyncio.Task] = []
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self.store = store
+        # Jobs changed since the last store write, keyed by id
+        self._dirty: Dict[str, Job] = {}
+        self._dirty_event: Optional[asyncio.Event] = None
+        self._writer_task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        self._queue = asyncio.Queue(maxsize=self._max_pending)
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        if self.store is not None:
+            self._dirty_event = asyncio.Event()
+            self._writer_task = asyncio.create_task(self._writer())
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        if self._writer_task is not None:
+            self._writer_task.cancel()
+            await asyncio.gather(self._writer_task, return_exceptions=True)
+            self._writer_task = None
+            # Record the cancelled jobs for the other workers
+            await self.flush()
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    def submit(self, text: str, level: str = "quick", kind: str = "summary",
+               client_id: str = "anonymous") -> Job:
+        if self._queue is None:
+            raise RuntimeError("JobManager.start() has not been called")
+
+        job = Job(kind, level, normalize_text(text), client_id, on_change=self._publish)
+
+        cached = self.cache.get(kind, job.digest, job.variant)
+        if cached is not None:
+            job.touch(status="done", stage="cached", result=cached)
+            job.text = ""
+            self._remember(job)
+            return job
+
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            raise JobQueueFull(self.scheduler.estimate_wait("bulk"))
+
+        self._remember(job)
+        self._publish(job)
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """A job running (or kept) in this worker"""
+        return self._jobs.get(job_id)
+
+    async def lookup(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Snapshot of a job from this worker or, failing that, the shared store"""
+        job = self._jobs.get(job_id)
+        if job is not None:
+            return job.snapshot()
+        if self.store is None:
+            return None
+        return await asyncio.to_thread(self.store.load, job_id)
+
+    async def watch(self, job_id: str, keepalive: float = 15.0,
+                    poll: float = 1.0) -> AsyncIterator[Optional[Dict[str, Any]]]:
+        """
+        Yield a snapshot on every change until the job finishes.
+        Yields None when nothing changed for `keepalive` seconds. A job
+        owned by another worker is followed by polling the store every
+        `poll` seconds.
+        """
+        job = self._jobs.get(job_id)
+        if job is None:
+            async for snapshot in self._watch_stored(job_id, keepalive, poll):
+                yield snapshot
+            return
+
+        while True:
+            changed = job._changed
+            yield job.snapshot(include_result=job.status in TERMINAL_STATES)
+            if job.status in TERMINAL_STATES:
+                return
+            try:
+                await asyncio.wait_for(changed.wait(), timeout=keepalive)
+            except asyncio.TimeoutError:
+                yield None
+
+    def get_stats(self) -> dict:
+        counts: Dict[str, int] = {}
+        for job in self._jobs.values():
+            counts[job.status] = counts.get(job.status, 0) + 1
+        return {
+            "workers": self.workers,
+            "pending": self._queue.qsize() if self._queue else 0,
+            "max_pending": self._max_pending,
+            "jobs": counts,
+        }
+
+    async def _watch_stored(self, job_id: str, keepalive: float,
+                            poll: float) -> AsyncIterator[Optional[Dict[str, Any]]]:
+        last_update = None
+        quiet = 0.0
+        while self.store is not None:
+            snapshot = await asyncio.to_thread(self.store.load, job_id)
+            if snapshot is None:
+                return
+            if snapshot["updated_at"] != last_update:
+                last_update = snapshot["updated_at"]
+                quiet = 0.0
+                if snapshot["status"] in TERMINAL_STATES:
+                    yield snapshot
+                    return
+                snapshot.pop("result", None)
+                yield snapshot
+            elif quiet >= keepalive:
+                quiet = 0.0
+                yield None
+            await asyncio.sleep(poll)
+            quiet += poll
+
+    # ------------------------------------------------------------------
+    # Shared store
+    # ------------------------------------------------------------------
+
+    def _publish(self, job: Job):
+        if self._dirty_event is None:
+            return
+        self._dirty[job.id] = job
+        self._dirty_event.set()
+
+    async def _writer(self):
+        while True:
+            await self._dirty_event.wait()
+            self._dirty_event.clear()
+            await self.flush()
+
+    async def flush(self):
+        """
+        Write pending changes to the store now. Call it before handing out
+        a new job id, so a poll that lands on another worker finds the job.
+        """
+        # Snapshots are taken at write time, so a burst of changes is one row
+        snapshots = [job.snapshot() for job in self._dirty.values()]
+        self._dirty.clear()
+        if not snapshots:
+            return
+        try:
+            await asyncio.to_thread(self.store.save, snapshots)
+        except sqlite3.Error:
+            logger.exception("Could not write job status to the shared store")
+
+    # ------------------------------------------------------------------
+    # Workers
+    # ------------------------------------------------------------------
+
+    def _remember(self, job: Job):
+        self._jobs[job.id] = job
+        # Drop the oldest finished jobs once we keep too many
+        if len(self._jobs) > self.max_jobs_kept:
+            for job_id in list(self._jobs):
+                if len(self._jobs) <= self.max_jobs_kept:
+                    break
+                if self._jobs[job_id].status in TERMINAL_STATES:
+                    del self._jobs[job_id]
+
+    async def _worker(self):
+        while True:
+            job = await self._queue.get()
+            try:
+                job.touch(status="running", stage="starting")
+                result = await self._run(job)
+                if result.pop("cacheable", True):
+                    self.cache.put(job.kind, job.digest, job.variant, result)
+                job.touch(status="done", stage="done", result=result)
+            except asyncio.CancelledError:
+                job.touch(status="failed", stage="cancelled", error="Server shutting down")
+                raise
+            except Exception as e:
+                logger.exception("Job %s failed", job.id)
+                job.touch(status="failed", stage="failed", error=str(e))
+            finally:
+                job.text = ""  # don't hold large documents after the job ends
+                self._queue.task_done()
+
+    async def _call(self, job: Job, func, *args):
+        """
+        Run one upstream call as bulk work, waiting out scheduler rejections
+        and exhausted quota without holding a slot
+        """
+        while True:
+            try:
+                async with self.scheduler.slot("bulk", job.client_id):
+                    return await asyncio.to_thread(func, *args)
+            except (SchedulerRejected, QuotaExhausted) as e:
+                await asyncio.sleep(min(max(e.retry_after, 1.0), 30.0))
+
+    async def _run(self, job: Job) -> Dict[str, Any]:
+        service = await asyncio.to_thread(self.get_service)
+        if service is None:
+            raise RuntimeError("Gemini service not available")
+
+        chunks = split_into_chunks(job.text, self.chunk_chars)
+        job.touch(stage="chunking", chunks_total=len(chunks))
+
+        if job.kind == "summary":
+            return await self._run_summary(job, service, chunks)
+        if job.kind == "mindmap":
+            return await self._run_mindmap(job, service, chunks)
+        raise ValueError(f"Unsupported job kind: {job.kind}")
+
+    async def _run_mindmap(self, job: Job, service, chunks: List[str]) -> Dict[str, Any]:
+        """One cheap mind map per chunk, merged with concept deduplication"""
+        maps = []
+        fallbacks = []
+        for chunk in chunks:
+            job.touch(stage="mapping")
+            mindmap = await self._call(job, service.generate_mindmap, chunk)
+            (fallbacks if mindmap.get("status") == "fallback" else maps).append(mindmap)
+            job.touch(
+                chunks_done=job.chunks_done + 1,
+                tokens_used=job.tokens_used + estimate_tokens(chunk) + 500,  # ~2000-char structured reply
+            )
+
+        job.touch(stage="merging")
+        merged = merge_mindmaps(maps or fallbacks, max_nodes=self.merge_max_nodes)
+        return {
+            "nodes": merged["nodes"],
+            "edges": merged["edges"],
+            "central_topic": merged["central_topic"],
+            "chunks": len(chunks),
+            # A map built only from fallbacks shouldn't be served from cache
+            "cacheable": bool(maps),
+        }
+
+    async def _run_summary(self, job: Job, service, chunks: List[str]) -> Dict[str, Any]:
+        if len(chunks) == 1:
+            job.touch(stage="summarizing")
+            summary = await self._call(job, service.generate_summary, chunks[0], job.level)
+            job.touch(chunks_done=1, tokens_used=job.tokens_used + estimate_tokens(chunks[0]) + estimate_tokens(summary))
+        else:
+            # Map: a detailed summary per chunk
+            partials = []
+            for chunk in chunks:
+                job.touch(stage="summarizing")
+                partial = await self._call(job, service.generate_summary, chunk, "detailed")
+                partials.append(partial)
+                job.touch(
+                    chunks_done=job.chunks_done + 1,
+                    tokens_used=job.tokens_used + estimate_tokens(chunk) + estimate_tokens(partial),
+                )
+
+            # Reduce: keep folding partial summaries until they fit one call
+            job.touch(stage="combining")
+            combined = "\n\n".join(partials)
+            while len(combined) > self.chunk_chars:
+                parts = split_into_chunks(combined, self.chunk_chars)
+                reduced = []
+                for part in parts:
+                    partial = await self._call(job, service.generate_summary, part, "detailed")
+                    reduced.append(partial)
+                    job.touch(tokens_used=job.tokens_used + estimate_tokens(part) + estimate_tokens(partial))
+                combined = "\n\n".join(reduced)
+
+            summary = await self._call(job, service.generate_summary, combined, job.level)
+            job.touch(tokens_used=job.tokens_used + estimate_tokens(combined) + estimate_tokens(summary))
+
+        return {
+            "summary": summary,
+            "level": job.level,
+            "characters_processed": len(job.text),
+            "chunks": len(chunks),
+        }
@@ -0,0 +1,201 @@
+# backend/services/layout.py - Server-side mind map layout (fills MindMapNode.position)
+from collections import deque
+from typing import Any, Dict, List, Tuple
+
+LAYOUTS = ("radial", "force")
+
+# Distance between rings in the radial layout, in pixels
+RING_SPACING = 160.0
+
+# force_layout builds n x n arrays every iteration; above this many nodes
+# apply_layout uses the radial layout instead
+FORCE_MAX_NODES = 300
+
+
+def _index_graph(nodes: List[Dict[str, Any]], edges: List[Dict[str, Any]]):
+    """Node index by id plus (source, target, is_tree_edge) index triples"""
+    index = {node["id"]: i for i, node in enumerate(nodes)}
+    pairs = []
+    for edge in edges:
+        source = index.get(edge.get("source"))
+        target = index.get(edge.get("target"))
+        if source is None or target is None or source == target:
+            continue
+        pairs.append((source, target, not edge.get("dashed")))
+    return index, pairs
+
+
+def _pick_root(nodes: List[Dict[str, Any]], pairs: List[Tuple[int, int, bool]]) -> int:
+    for i, node in enumerate(nodes):
+        if node.get("type") in ("central", "main"):
+            return i
+    degree = [0] * len(nodes)
+    for source, target, _ in pairs:
+        degree[source] += 1
+        degree[target] += 1
+    return max(range(len(nodes)), key=lambda i: (degree[i], -i))
+
+
+def _spanning_tree(count: int, root: int, pairs: List[Tuple[int, int, bool]]):
+    """
+    BFS tree from the root. Hierarchy edges are used first, "related to"
+    (dashed) edges only to reach what's left, and disconnected nodes hang
+    off the root so every node gets a position.
+    """
+    tree_adj: List[List[int]] = [[] for _ in range(count)]
+    extra_adj: List[List[int]] = [[] for _ in range(count)]
+    for source, target, is_tree in pairs:
+        adj = tree_adj if is_tree else extra_adj
+        adj[source].append(target)
+        adj[target].append(source)
+
+    parent = [-1] * count
+    depth = [0] * count
+    children: List[List[int]] = [[] for _ in range(count)]
+    seen = [False] * count
+    seen[root] = True
+    order = [root]
+
+    for adjacency in (tree_adj, extra_adj):
+        queue = deque(order)
+        while queue:
+            current = queue.popleft()
+            for neighbour in adjacency[current]:
+                if not seen[neighbour]:
+                    seen[neighbour] = True
+                    parent[neighbour] = current
+                    depth[neighbour] = depth[current] + 1
+                    children[current].append(neighbour)
+                    order.append(neighbour)
+                    queue.append(neighbour)
+
+    for i in range(count):
+        if not seen[i]:
+            seen[i] = True
+            parent[i] = root
+            depth[i] = 1
+            children[root].append(i)
+            order.append(i)
+
+    return parent, depth, children, order
+
+
+def radial_layout(nodes: List[Dict[str, Any]], edges: List[Dict[str, Any]]):
+    """
+    Root in the centre, each ring one tree level further out. Every subtree
+    gets an angular wedge proportional to its number of leaves.
+    Returns an (n, 2) float array.
+    """
+    import numpy as np
+
+    count = len(nodes)
+    if count == 0:
+        return np.zeros((0, 2))
+
+    _, pairs = _index_graph(nodes, edges)
+    root = _pick_root(nodes, pairs)
+    parent, depth, children, order = _spanning_tree(count, root, pairs)
+
+    # Leaves per subtree, accumulated bottom-up over the BFS order
+    leaves = np.array([0 if children[i] else 1 for i in range(count)], dtype=float)
+    order_arr = np.array(order)
+    parent_arr = np.array(parent)
+    for i in order_arr[::-1]:
+        if parent_arr[i] >= 0:
+            leaves[parent_arr[i]] += leaves[i]
+
+    # Wedge start/width per node, top-down
+    start = np.zeros(count)
+    width = np.zeros(count)
+    width[root] = 2 * np.pi
+    for current in order:
+        kids = children[current]
+        if not kids:
+            continue
+        shares = leaves[kids] / leaves[kids].sum() * width[current]
+        start[kids] = start[current] + np.concatenate(([0.0], np.cumsum(shares)[:-1]))
+        width[kids] = shares
+
+    angle = start + width / 2
+    radius = np.array(depth, dtype=float) * RING_SPACING
+    return np.column_stack((radius * np.cos(angle), radius * np.sin(angle)))
+
+
+def force_layout(nodes: List[Dict[str, Any]], edges: List[Dict[str, Any]], iterations: int = 120):
+    """
+    Fruchterman-Reingold, vectorized over the full node/edge arrays and
+    seeded from the radial layout so the result is deterministic.
+    Returns an (n, 2) float array.
+    """
+    import numpy as np
+
+    positions = radial_layout(nodes, edges)
+    count = len(positions)
+    if count < 3:
+        return positions
+
+    _, pairs = _index_graph(nodes, edges)
+    if pairs:
+        source = np.array([p[0] for p in pairs])
+        target = np.array([p[1] for p in pairs])
+    else:
+        source = target = np.zeros(0, dtype=int)
+
+    extent = max(np.abs(positions).max(), RING_SPACING)
+    # Ideal edge length for the area we want to fill
+    k = np.sqrt((2 * extent) ** 2 / count)
+    temperature = extent / 10
+    cooling = temperature / (iterations + 1)
+    # Tiny deterministic offsets keep coincident nodes from dividing by zero
+    jitter = np.column_stack((np.cos(np.arange(count)), np.sin(np.arange(count)))) * 1e-3
+
+    pos = positions + jitter
+    for _ in range(iterations):
+        delta = pos[:, None, :] - pos[None, :, :]
+        distance = np.linalg.norm(delta, axis=-1)
+        np.fill_diagonal(distance, 1.0)
+        distance = np.maximum(distance, 1e-2)
+
+        # Repulsion between every pair: k^2 / d along delta
+        displacement = ((k * k / distance ** 2)[:, :, None] * delta).sum(axis=1)
+
+        # Attraction along edges: d^2 / k
+        if len(source):
+            edge_delta = pos[source] - pos[target]
+            edge_distance = np.maximum(np.linalg.norm(edge_delta, axis=1), 1e-2)
+            pull = (edge_distance / k)[:, None] * edge_delta
+            np.add.at(displacement, source, -pull)
+            np.add.at(displacement, target, pull)
+
+        length = np.maximum(np.linalg.norm(displacement, axis=1), 1e-9)
+        pos += displacement / length[:, None] * np.minimum(length, temperature)[:, None]
+        temperature -= cooling
+
+    # Recentre on the root and scale back to the radial extent
+    root = _pick_root(nodes, pairs)
+    pos -= pos[root]
+    scale = extent / max(np.abs(pos).max(), 1e-9)
+    return pos * scale
+
+
+def apply_layout(mindmap: Dict[str, Any], layout: str = "radial") -> Dict[str, Any]:
+    """
+    Return a copy of the mind map with position {x, y} set on every node.
+    "layout" in the result names the layout actually used.
+    """
+    if layout not in LAYOUTS:
+        raise ValueError(f"Unknown layout: {layout}")
+
+    nodes = mindmap.get("nodes", [])
+    edges = mindmap.get("edges", [])
+    if layout == "force" and len(nodes) > FORCE_MAX_NODES:
+        layout = "radial"
+    compute = radial_layout if layout == "radial" else force_layout
+    # "+ 0.0" turns -0.0 into 0.0
+    coordinates = (compute(nodes, edges).round(1) + 0.0).tolist()
+
+    placed = [
+        {**node, "position": {"x": x, "y": y}}
+        for node, (x, y) in zip(nodes, coordinates)
+    ]
+    return {**mindmap, "nodes": placed, "layout": layout}
@@ -0,0 +1,247 @@
+# backend/services/mindmap_merge.py - Merge several mind maps into one
+import heapq
+import re
+from difflib import SequenceMatcher
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+# Higher rank wins when duplicates of different types are merged
+TYPE_RANK = {"central": 3, "main": 3, "branch": 2, "sub": 2, "detail": 1}
+TYPE_SIZE = {"central": 30, "branch": 24, "detail": 18}
+CANONICAL_TYPE = {"main": "central", "sub": "branch"}
+
+_STOPWORDS = {"a", "an", "the", "of", "and", "or", "in", "on", "for", "to", "with", "its", "their"}
+_NON_WORD = re.compile(r"[^\w\s]+")
+_ROMAN = re.compile(r"^(?=[ivxlcdm]+$)m{0,3}(cm|cd|d?c{0,3})(xc|xl|l?x{0,3})(ix|iv|v?i{0,3})$")
+
+
+def normalize_label(label: str) -> str:
+    """Lowercase, drop punctuation and stopwords, crude singularization"""
+    tokens = []
+    for token in _NON_WORD.sub(" ", label.lower()).split():
+        if token in _STOPWORDS:
+            continue
+        if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+            token = token[:-1]
+        tokens.append(token)
+    return " ".join(tokens)
+
+
+def _markers(key: str) -> Tuple[str, ...]:
+    """
+    Tokens that tell otherwise similar labels apart: numbers and roman
+    numerals ("World War I" / "World War II", "Type 1" / "Type 2") and
+    single letters ("Vitamin C" / "Vitamin D")
+    """
+    return tuple(
+        token for token in key.split()
+        if len(token) == 1 or any(c.isdigit() for c in token) or _ROMAN.match(token)
+    )
+
+
+def _blocks(key: str) -> Set[str]:
+    """Blocking keys: each token plus the first letters of the unspaced label"""
+    return set(key.split()) | {"#" + key.replace(" ", "")[:4]}
+
+
+class _ConceptIndex:
+    """
+    Exact lookup on normalized labels (spaces ignored, so "back-propagation"
+    meets "backpropagation"), then fuzzy matching against candidates that
+    share a blocking key, which keeps this far below all-pairs comparison.
+    A fuzzy match also needs the same number/numeral tokens, since those
+    labels differ by a character or two but name different concepts.
+    """
+
+    def __init__(self, threshold: float = 0.85, max_bucket: int = 50):
+        self.threshold = threshold
+        self.max_bucket = max_bucket
+        self.exact: Dict[str, int] = {}
+        self.blocks: Dict[str, List[int]] = {}
+        self.keys: List[str] = []
+        self.markers: List[Tuple[str, ...]] = []
+
+    def find(self, key: str) -> Optional[int]:
+        compact = key.replace(" ", "")
+        if compact in self.exact:
+            return self.exact[compact]
+
+        candidates: Set[int] = set()
+        for block in _blocks(key):
+            bucket = self.blocks.get(block, [])
+            # Very common blocks say little about identity
+            if len(bucket) <= self.max_bucket:
+                candidates.update(bucket)
+
+        markers = _markers(key)
+        best, best_score = None, self.threshold
+        for concept in sorted(candidates):
+            if self.markers[concept] != markers:
+                continue
+            score = SequenceMatcher(None, compact, self.keys[concept]).ratio()
+            if score >= best_score:
+                best, best_score = concept, score
+        return best
+
+    def add(self, key: str) -> int:
+        concept = len(self.keys)
+        compact = key.replace(" ", "")
+        self.keys.append(compact)
+        self.markers.append(_markers(key))
+        self.exact[compact] = concept
+        for block in _blocks(key):
+            self.blocks.setdefault(block, []).append(concept)
+        return concept
+
+
+def merge_mindmaps(
+    graphs: List[Dict[str, Any]],
+    max_nodes: int = 80,
+    threshold: float = 0.85,
+) -> Dict[str, Any]:
+    """
+    Merge node/edge graphs into one map.
+
+    Duplicate concepts (same normalized label, or a fuzzy match above
+    `threshold`) collapse into one node that keeps the strongest type, so
+    duplicate branches and their children fold together. A single central
+    node is kept: the most frequent central topic; other central topics
+    become branches under it. Nodes and edges are re-numbered, parallel
+    edges and self-loops are dropped, and if the result has more than
+    `max_nodes` nodes the least important ones are pruned.
+    """
+    index = _ConceptIndex(threshold)
+    labels: List[str] = []
+    types: List[str] = []
+    mentions: List[int] = []
+    centrals: List[int] = []
+    edge_set: Dict[tuple, Dict[str, Any]] = {}
+
+    for graph in graphs:
+        local: Dict[str, int] = {}
+        for node in graph.get("nodes", []):
+            label = (node.get("label") or "").strip()
+            key = normalize_label(label) or label.lower()
+            if not key:
+                continue
+            node_type = CANONICAL_TYPE.get(node.get("type"), node.get("type") or "detail")
+
+            concept = index.find(key)
+            if concept is None:
+                concept = index.add(key)
+                labels.append(label)
+                types.append(node_type)
+                mentions.append(0)
+            elif TYPE_RANK.get(node_type, 0) > TYPE_RANK.get(types[concept], 0):
+                types[concept] = node_type
+            mentions[concept] += 1
+            if node_type == "central":
+                centrals.append(concept)
+            local[node["id"]] = concept
+
+        for edge in graph.get("edges", []):
+            source = local.get(edge.get("source"))
+            target = local.get(edge.get("target"))
+            if source is None or target is None or source == target:
+                continue
+            key = (source, target)
+            if key not in edge_set and (target, source) not in edge_set:
+                edge_set[key] = {"label": edge.get("label"), "dashed": bool(edge.get("dashed"))}
+            elif key in edge_set and edge_set[key]["dashed"] and not edge.get("dashed"):
+                # A hierarchy edge beats a "related to" edge between the same pair
+                edge_set[key] = {"label": edge.get("label"), "dashed": False}
+
+    if not labels:
+        return _result([], [], "")
+
+    # One root: the central topic mentioned most often (first seen on ties)
+    root = None
+    if centrals:
+        root = max(dict.fromkeys(centrals), key=lambda c: mentions[c])
+        for concept in set(centrals):
+            if concept != root:
+                types[concept] = "branch"
+                if (root, concept) not in edge_set and (concept, root) not in edge_set:
+                    edge_set[(root, concept)] = {"label": "contains", "dashed": False}
+    else:
+        root = max(range(len(labels)), key=lambda c: (TYPE_RANK.get(types[c], 0), mentions[c]))
+    types[root] = "central"
+
+    keep = _prune(len(labels), root, edge_set, types, mentions, max_nodes)
+
+    # Re-id in a stable order: root first, then by first appearance
+    order = [root] + [c for c in range(len(labels)) if c in keep and c != root]
+    new_id = {concept: f"node_{i}" for i, concept in enumerate(order)}
+
+    nodes = [
+        {
+            "id": new_id[c],
+            "label": labels[c],
+            "type": types[c],
+            "size": TYPE_SIZE.get(types[c], 18),
+        }
+        for c in order
+    ]
+    edges = []
+    for (source, target), info in edge_set.items():
+        if source in new_id and target in new_id:
+            edge = {
+                "id": f"edge_{len(edges)}",
+                "source": new_id[source],
+                "target": new_id[target],
+                "label": info["label"],
+            }
+            if info["dashed"]:
+                edge["dashed"] = True
+            edges.append(edge)
+
+    return _result(nodes, edges, labels[root], merged_from=len(graphs))
+
+
+def _prune(count: int, root: int, edge_set: Dict[tuple, Dict[str, Any]],
+           types: List[str], mentions: List[int], max_nodes: int) -> Set[int]:
+    """
+    Grow the kept set outward from the root, always taking the most
+    important reachable concept next, so the kept graph stays connected.
+    Importance = type rank + how often the concept was mentioned + degree.
+    """
+    adjacency: List[List[int]] = [[] for _ in range(count)]
+    for source, target in edge_set:
+        adjacency[source].append(target)
+        adjacency[target].append(source)
+
+    if count <= max_nodes:
+        return set(range(count))
+
+    def importance(concept: int) -> float:
+        return 2.0 * TYPE_RANK.get(types[concept], 0) + mentions[concept] + 0.5 * len(adjacency[concept])
+
+    keep = {root}
+    frontier = [(-importance(n), n) for n in adjacency[root]]
+    heapq.heapify(frontier)
+    while frontier and len(keep) < max_nodes:
+        _, concept = heapq.heappop(frontier)
+        if concept in keep:
+            continue
+        keep.add(concept)
+        for neighbour in adjacency[concept]:
+            if neighbour not in keep:
+                heapq.heappush(frontier, (-importance(neighbour), neighbour))
+
+    # Concepts unreachable from the root compete for what is left
+    if len(keep) < max_nodes:
+        rest = sorted((c for c in range(count) if c not in keep), key=importance, reverse=True)
+        keep.update(rest[:max_nodes - len(keep)])
+    return keep
+
+
+def _result(nodes: List[Dict[str, Any]], edges: List[Dict[str, Any]],
+            central_topic: str, merged_from: int = 0) -> Dict[str, Any]:
+    return {
+        "nodes": nodes,
+        "edges": edges,
+        "total_nodes": len(nodes),
+        "total_edges": len(edges),
+        "central_topic": central_topic,
+        "merged_from": merged_from,
+        "status": "success"
+    }
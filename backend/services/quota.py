@@ -0,0 +1,244 @@
+# backend/services/quota.py - Upstream quota shared by every worker on the host
+import hashlib
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+logger = logging.getLogger("synapsemind")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS quota_windows (
+    scope TEXT NOT NULL,
+    window TEXT NOT NULL,
+    window_start INTEGER NOT NULL,
+    requests INTEGER NOT NULL DEFAULT 0,
+    tokens INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (scope, window, window_start)
+)
+"""
+
+
+class QuotaExhausted(Exception):
+    """Raised when budget frees up later than the caller is willing to wait"""
+
+    def __init__(self, retry_after: float):
+        super().__init__(f"Upstream quota exhausted, retry in {retry_after:.0f}s")
+        self.reason = "Upstream quota exhausted"
+        self.retry_after = retry_after
+
+
+class QuotaCoordinator:
+    """
+    Per-minute and per-day request/token budget kept in a SQLite ledger
+    that all uvicorn workers on the host open, so together they stay under
+    the upstream limits instead of each assuming it owns the whole quota.
+
+    To keep the ledger off the hot path, a worker leases budget in small
+    batches (BEGIN IMMEDIATE serializes leases across processes) and spends
+    it locally. Unspent budget expires with its minute window, so smaller
+    batches waste less quota; larger batches touch the database less often.
+    A limit of 0 means unlimited. acquire() never sleeps longer than
+    max_wait in total; past that (e.g. the daily budget is gone) it raises
+    QuotaExhausted so the caller can give its slot back.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        scope: str = "default",
+        requests_per_minute: int = 1,
+        tokens_per_minute: int = 0,
+        requests_per_day: int = 0,
+        lease_requests: int = 2,
+        lease_tokens: int = 20000,
+        max_wait: float = 60.0,
+    ):
+        self.path = path
+        self.scope = scope
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.requests_per_day = requests_per_day
+        self.lease_requests = max(1, lease_requests)
+        self.lease_tokens = max(1, lease_tokens)
+        self.max_wait = max_wait
+
+        self._lock = threading.Lock()
+        self._window = -1
+        self._requests_left = 0
+        self._tokens_left = 0
+        self._blocked_until = 0.0
+        # When the ledger's budget we last drew the final share of frees up
+        self._spent_until = 0.0
+
+        with self._connect() as db:
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute(_SCHEMA)
+
+    @classmethod
+    def from_config(cls, api_key: str = "") -> "QuotaCoordinator":
+        from config import Config
+
+        path = Config.QUOTA_DB_PATH or os.path.join(tempfile.gettempdir(), "synapsemind-quota.sqlite3")
+        # One ledger scope per API key: the quota belongs to the key
+        scope = hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:16]
+        return cls(
+            path,
+            scope=scope,
+            requests_per_minute=Config.QUOTA_REQUESTS_PER_MINUTE,
+            tokens_per_minute=Config.QUOTA_TOKENS_PER_MINUTE,
+            requests_per_day=Config.QUOTA_REQUESTS_PER_DAY,
+            lease_requests=Config.QUOTA_LEASE_REQUESTS,
+            lease_tokens=Config.QUOTA_LEASE_TOKENS,
+            max_wait=Config.QUOTA_MAX_WAIT,
+        )
+
+    def _connect(self) -> sqlite3.Connection:
+        # Short-lived connections: sqlite3 objects can't be shared across threads
+        return sqlite3.connect(self.path, timeout=30, isolation_level=None)
+
+    # ------------------------------------------------------------------
+    # Leasing
+    # ------------------------------------------------------------------
+
+    def _lease(self, minute: int, day: int, tokens_needed: int) -> float:
+        """
+        Take a batch of budget from the ledger into the local lease.
+        Returns 0 on success, else seconds until budget frees up.
+        """
+        want_requests = self.lease_requests
+        want_tokens = max(self.lease_tokens, tokens_needed)
+
+        db = self._connect()
+        try:
+            db.execute("BEGIN IMMEDIATE")
+            used = {}
+            for window, start in (("minute", minute), ("day", day)):
+                row = db.execute(
+                    "SELECT requests, tokens FROM quota_windows WHERE scope=? AND window=? AND window_start=?",
+                    (self.scope, window, start),
+                ).fetchone()
+                used[window] = row or (0, 0)
+
+            grant_requests = want_requests
+            if self.requests_per_minute:
+                grant_requests = min(grant_requests, self.requests_per_minute - used["minute"][0])
+            if self.requests_per_day:
+                grant_requests = min(grant_requests, self.requests_per_day - used["day"][0])
+
+            grant_tokens = want_tokens
+            if self.tokens_per_minute:
+                grant_tokens = min(grant_tokens, self.tokens_per_minute - used["minute"][1])
+
+            if grant_requests <= 0 or grant_tokens < tokens_needed:
+                db.execute("ROLLBACK")
+                if self.requests_per_day and used["day"][0] >= self.requests_per_day:
+                    return (day + 1) * 86400 - time.time()
+                return (minute + 1) * 60 - time.time()
+
+            for window, start in (("minute", minute), ("day", day)):
+                db.execute(
+                    "INSERT INTO quota_windows (scope, window, window_start, requests, tokens) "
+                    "VALUES (?, ?, ?, ?, ?) "
+                    "ON CONFLICT (scope, window, window_start) DO UPDATE SET "
+                    "requests = requests + excluded.requests, tokens = tokens + excluded.tokens",
+                    (self.scope, window, start, grant_requests, grant_tokens),
+                )
+            # Old windows are never read again
+            db.execute(
+                "DELETE FROM quota_windows WHERE scope=? AND window='minute' AND window_start < ?",
+                (self.scope, minute - 5),
+            )
+            db.execute("COMMIT")
+        except Exception:
+            if db.in_transaction:
+                db.execute("ROLLBACK")
+            raise
+        finally:
+            db.close()
+
+        self._requests_left += grant_requests
+        self._tokens_left += grant_tokens
+
+        # Took the last of a window: once this lease is spent, the next call
+        # waits for that window to end, and the scheduler should know
+        if self.requests_per_day and used["day"][0] + grant_requests >= self.requests_per_day:
+            self._spent_until = (day + 1) * 86400
+        elif (
+            (self.requests_per_minute and used["minute"][0] + grant_requests >= self.requests_per_minute)
+            or (self.tokens_per_minute and used["minute"][1] + grant_tokens >= self.tokens_per_minute)
+        ):
+            self._spent_until = (minute + 1) * 60
+        else:
+            self._spent_until = 0.0
+        return 0.0
+
+    def acquire(self, tokens: int = 0) -> float:
+        """
+        Block until one request (and `tokens` tokens) of budget is available
+        and spend it. Returns the number of seconds spent waiting; raises
+        QuotaExhausted if that would take longer than max_wait.
+        """
+        if self.tokens_per_minute:
+            # A call bigger than a whole minute's budget still has to go through
+            tokens = min(tokens, self.tokens_per_minute)
+
+        waited = 0.0
+        with self._lock:
+            while True:
+                now = time.time()
+                minute = int(now // 60)
+                if self._window != minute:
+                    self._requests_left = self._tokens_left = 0
+                    self._window = minute
+
+                if self._requests_left > 0 and self._tokens_left >= tokens:
+                    self._requests_left -= 1
+                    self._tokens_left -= tokens
+                    self._blocked_until = 0.0
+                    return waited
+
+                delay = self._lease(minute, int(now // 86400), tokens)
+                if delay <= 0:
+                    continue
+
+                self._blocked_until = now + delay
+                if waited + delay > self.max_wait:
+                    raise QuotaExhausted(delay)
+                logger.info("Upstream quota exhausted, waiting %.1fs", delay)
+                time.sleep(delay)
+                waited += delay
+
+    def seconds_until_available(self) -> float:
+        """Local estimate only (no ledger read), for the scheduler's wait estimate"""
+        now = time.time()
+        if self._requests_left > 0 and self._window == int(now // 60):
+            return 0.0
+        return max(0.0, self._blocked_until - now, self._spent_until - now)
+
+    def usage(self) -> dict:
+        """Host-wide usage from the ledger (leased budget counts as used)"""
+        now = time.time()
+        db = self._connect()
+        try:
+            rows = dict(
+                (window, (requests, tokens))
+                for window, requests, tokens in db.execute(
+                    "SELECT window, requests, tokens FROM quota_windows "
+                    "WHERE scope=? AND ((window='minute' AND window_start=?) OR (window='day' AND window_start=?))",
+                    (self.scope, int(now // 60), int(now // 86400)),
+                )
+            )
+        finally:
+            db.close()
+
+        return {
+            "requests_this_minute": rows.get("minute", (0, 0))[0],
+            "tokens_this_minute": rows.get("minute", (0, 0))[1],
+            "requests_today": rows.get("day", (0, 0))[0],
+            "requests_per_minute": self.requests_per_minute,
+            "tokens_per_minute": self.tokens_per_minute,
+            "requests_per_day": self.requests_per_day,
+        }
@@ -0,0 +1,44 @@
+# backend/services/registry.py - Lazily built backend services
+import logging
+import threading
+from typing import Any, Callable, Optional
+
+logger = logging.getLogger("synapsemind")
+
+
+class LazyService:
+    """
+    Build a backend the first time it is needed instead of at import time.
+    A failed build is remembered (and reported by /health) rather than
+    silently turning the service into None.
+    """
+
+    def __init__(self, name: str, factory: Callable[[], Any]):
+        self.name = name
+        self._factory = factory
+        self._instance = None
+        self._error: Optional[str] = None
+        self._lock = threading.Lock()
+
+    def get(self) -> Optional[Any]:
+        """Return the service, building it on first call; None if the build failed"""
+        if self._instance is not None or self._error is not None:
+            return self._instance
+
+        with self._lock:
+            if self._instance is None and self._error is None:
+                try:
+                    self._instance = self._factory()
+                    logger.info("%s service initialized", self.name)
+                except Exception as e:
+                    self._error = f"{type(e).__name__}: {e}"
+                    logger.exception("Failed to initialize %s service", self.name)
+        return self._instance
+
+    def peek(self) -> Optional[Any]:
+        """Return the service only if it is already built"""
+        return self._instance
+
+    @property
+    def error(self) -> Optional[str]:
+        return self._error
@@ -0,0 +1,121 @@
+# backend/services/result_cache.py - Content-addressed cache for generated results
+import hashlib
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+
+# Cache variant for a mind map without server-side layout
+MINDMAP_VARIANT = "default"
+
+# Explicit whitespace set so the extension (utils/textUtils.js) can
+# normalize and hash byte-for-byte the same way
+_WHITESPACE = re.compile(
+    "[\t\n\v\f\r \u00a0\u1680\u2000-\u200a\u2028\u2029\u202f\u205f\u3000\ufeff]+"
+)
+
+
+# Anything normalize_text would change: a non-space whitespace character,
+# a double space, or a space at either end
+_NOT_NORMALIZED = re.compile(
+    "[\t\n\v\f\r\u00a0\u1680\u2000-\u200a\u2028\u2029\u202f\u205f\u3000\ufeff]|  |^ | \\Z"
+)
+
+
+def normalize_text(text: str) -> str:
+    """Collapse whitespace runs to one space and trim both ends"""
+    if not _NOT_NORMALIZED.search(text):
+        return text  # already normalized, skip the copy
+    return _WHITESPACE.sub(" ", text).strip(" ")
+
+
+class TextNormalizer:
+    """
+    normalize_text() for text that arrives in pieces: feed() each piece,
+    then result() joins the normalized parts once. A whitespace run split
+    across two pieces still becomes a single space.
+    """
+
+    def __init__(self):
+        self._parts = []
+        self._space = False  # whitespace seen since the last kept text
+
+    def feed(self, piece: str):
+        if not piece:
+            return
+        piece = _WHITESPACE.sub(" ", piece)
+        core = piece.strip(" ")
+        if not core:
+            self._space = True
+            return
+        if self._parts and (self._space or piece[0] == " "):
+            self._parts.append(" ")
+        self._parts.append(core)
+        self._space = piece[-1] == " "
+
+    def result(self) -> str:
+        text = "".join(self._parts)
+        self._parts = [text]
+        return text
+
+
+def content_hash(text: str, normalized: bool = False) -> str:
+    """sha256 hex digest of the normalized text, UTF-8 encoded"""
+    if not normalized:
+        text = normalize_text(text)
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class ResultCache:
+    """
+    In-memory LRU cache with a TTL, keyed by (kind, variant, content hash).
+
+    kind is "summary" or "mindmap"; variant is the summary level or the
+    mind map options. Values are plain dicts and are returned as-is.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl_seconds: float = 3600):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _key(kind: str, digest: str, variant: str) -> str:
+        return f"{kind}:{variant}:{digest}"
+
+    def get(self, kind: str, digest: str, variant: str = "") -> Optional[Dict[str, Any]]:
+        key = self._key(kind, digest, variant)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            stored_at, value = entry
+            if time.time() - stored_at > self.ttl_seconds:
+                del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, kind: str, digest: str, variant: str, value: Dict[str, Any]):
+        key = self._key(kind, digest, variant)
+        with self._lock:
+            self._entries[key] = (time.time(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get_stats(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
@@ -0,0 +1,214 @@
+# backend/services/scheduler.py - Priority scheduler with admission control
+import asyncio
+import heapq
+import itertools
+import math
+import time
+from contextlib import asynccontextmanager
+from typing import Callable, Dict, List, Optional
+
+# Lower index = served first
+PRIORITY_CLASSES = ("interactive", "bulk", "probe")
+
+
+class SchedulerRejected(Exception):
+    """Raised when a request cannot be served before its deadline"""
+
+    def __init__(self, reason: str, retry_after: float):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class _Ticket:
+    __slots__ = ("priority", "client_id", "virtual_start", "virtual_finish",
+                 "future", "abandoned", "enqueued_at")
+
+    def __init__(self, priority: str, client_id: str, virtual_start: float,
+                 virtual_finish: float, future: asyncio.Future):
+        self.priority = priority
+        self.client_id = client_id
+        self.virtual_start = virtual_start
+        self.virtual_finish = virtual_finish
+        self.future = future
+        self.abandoned = False
+        self.enqueued_at = time.monotonic()
+
+
+class PriorityScheduler:
+    """
+    Central gate in front of the upstream model slots.
+
+    Classes are served in strict priority order (interactive, bulk, probe).
+    Inside a class, clients share the slots by weight using start-time fair
+    queuing, so one busy client cannot starve the others. The queue is
+    bounded and every request carries a deadline: if the estimated wait is
+    longer than the deadline, the request is rejected immediately instead
+    of sitting in line.
+    """
+
+    def __init__(
+        self,
+        slots: int = 1,
+        max_queue: int = 64,
+        default_deadlines: Optional[Dict[str, float]] = None,
+        client_weights: Optional[Dict[str, float]] = None,
+        initial_service_time: float = 5.0,
+        ready_delay: Optional[Callable[[], float]] = None,
+    ):
+        self.slots = max(1, slots)
+        self.max_queue = max_queue
+        self.default_deadlines = default_deadlines or {}
+        self.client_weights = client_weights or {}
+        self.ready_delay = ready_delay
+
+        self._queues: Dict[str, List] = {p: [] for p in PRIORITY_CLASSES}
+        self._queued: Dict[str, int] = {p: 0 for p in PRIORITY_CLASSES}
+        self._virtual_time: Dict[str, float] = {p: 0.0 for p in PRIORITY_CLASSES}
+        self._client_finish: Dict[str, Dict[str, float]] = {p: {} for p in PRIORITY_CLASSES}
+        self._seq = itertools.count()
+        self._active = 0
+
+        # Exponentially weighted average of how long a slot is held
+        self._service_time = initial_service_time
+        self._alpha = 0.2
+
+        self.admitted = 0
+        self.rejected = 0
+
+    # ------------------------------------------------------------------
+    # Admission
+    # ------------------------------------------------------------------
+
+    def estimate_wait(self, priority: str) -> float:
+        """Rough seconds until a new request of this class would start"""
+        rank = PRIORITY_CLASSES.index(priority)
+        ahead = sum(self._queued[p] for p in PRIORITY_CLASSES[:rank + 1])
+        busy = max(0, self._active - self.slots + 1)
+        wait = (ahead + busy) * self._service_time / self.slots
+        if self.ready_delay and ahead + busy == 0:
+            wait += max(0.0, self.ready_delay())
+        return wait
+
+    def _admit(self, priority: str, client_id: str, deadline: float) -> _Ticket:
+        if priority not in PRIORITY_CLASSES:
+            raise ValueError(f"Unknown priority class: {priority}")
+
+        estimate = self.estimate_wait(priority)
+        if sum(self._queued.values()) >= self.max_queue:
+            self.rejected += 1
+            raise SchedulerRejected("Scheduler queue is full", estimate)
+        if estimate > deadline:
+            self.rejected += 1
+            raise SchedulerRejected(
+                f"Estimated wait {estimate:.1f}s exceeds deadline {deadline:.1f}s",
+                estimate,
+            )
+
+        weight = self.client_weights.get(client_id, 1.0)
+        finishes = self._client_finish[priority]
+        start = max(self._virtual_time[priority], finishes.get(client_id, 0.0))
+        finish = start + 1.0 / weight
+        finishes[client_id] = finish
+
+        future = asyncio.get_running_loop().create_future()
+        ticket = _Ticket(priority, client_id, start, finish, future)
+        heapq.heappush(self._queues[priority], (finish, next(self._seq), ticket))
+        self._queued[priority] += 1
+        self.admitted += 1
+        return ticket
+
+    def _dispatch(self):
+        while self._active < self.slots:
+            ticket = self._pop_next()
+            if ticket is None:
+                return
+            self._active += 1
+            ticket.future.set_result(True)
+
+    def _pop_next(self) -> Optional[_Ticket]:
+        for priority in PRIORITY_CLASSES:
+            queue = self._queues[priority]
+            while queue:
+                _, _, ticket = heapq.heappop(queue)
+                if ticket.abandoned:
+                    continue
+                self._queued[priority] -= 1
+                self._virtual_time[priority] = ticket.virtual_start
+                if not self._queued[priority]:
+                    # Idle class: forget history so returning clients start fresh
+                    self._client_finish[priority].clear()
+                return ticket
+        return None
+
+    def _abandon(self, ticket: _Ticket):
+        ticket.abandoned = True
+        self._queued[ticket.priority] -= 1
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    async def acquire(
+        self,
+        priority: str = "interactive",
+        client_id: str = "anonymous",
+        deadline: Optional[float] = None,
+    ) -> _Ticket:
+        """Wait for a slot; raises SchedulerRejected if the deadline can't be met"""
+        if deadline is None:
+            deadline = self.default_deadlines.get(priority, math.inf)
+
+        ticket = self._admit(priority, client_id, deadline)
+        self._dispatch()
+
+        try:
+            done, _ = await asyncio.wait({ticket.future}, timeout=None if math.isinf(deadline) else deadline)
+        except asyncio.CancelledError:
+            if ticket.future.done():
+                self.release(ticket)
+            else:
+                self._abandon(ticket)
+            raise
+
+        # The slot may have been handed over after the timeout fired but
+        # before we resumed; then it is ours and must not be abandoned
+        if not done and not ticket.future.done():
+            self._abandon(ticket)
+            self.rejected += 1
+            raise SchedulerRejected("Deadline expired while queued", self.estimate_wait(priority))
+        return ticket
+
+    def release(self, ticket: _Ticket, held_for: Optional[float] = None):
+        """Return a slot and feed the observed hold time into the estimate"""
+        self._active -= 1
+        if held_for is not None:
+            self._service_time += self._alpha * (held_for - self._service_time)
+        self._dispatch()
+
+    @asynccontextmanager
+    async def slot(
+        self,
+        priority: str = "interactive",
+        client_id: str = "anonymous",
+        deadline: Optional[float] = None,
+    ):
+        ticket = await self.acquire(priority, client_id, deadline)
+        started = time.monotonic()
+        try:
+            yield ticket
+        finally:
+            self.release(ticket, time.monotonic() - started)
+
+    def get_stats(self) -> dict:
+        """Queue depth and estimates for the usage endpoint"""
+        return {
+            "slots": self.slots,
+            "active": self._active,
+            "queued": dict(self._queued),
+            "max_queue": self.max_queue,
+            "avg_service_seconds": round(self._service_time, 2),
+            "estimated_wait": {p: round(self.estimate_wait(p), 2) for p in PRIORITY_CLASSES},
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+        }
@@ -0,0 +1,146 @@
+# backend/services/tracing.py - Opt-in per-request spans and profiles
+import contextvars
+import cProfile
+import os
+import pstats
+import re
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+
+_current_trace: contextvars.ContextVar = contextvars.ContextVar("synapsemind_trace", default=None)
+
+
+class Trace:
+    """
+    Spans recorded for one request, plus an optional merged cProfile.
+    Spans may be added from threadpool workers, hence the lock.
+    """
+
+    def __init__(self, profile: bool = False):
+        self.started = time.perf_counter()
+        self.profile = profile
+        self.spans: List[Tuple[str, float]] = []
+        self.stats: Optional[pstats.Stats] = None
+        self._lock = threading.Lock()
+
+    def add_span(self, name: str, seconds: float):
+        with self._lock:
+            self.spans.append((name, seconds))
+
+    def add_profile(self, profiler: cProfile.Profile):
+        with self._lock:
+            if self.stats is None:
+                self.stats = pstats.Stats(profiler)
+            else:
+                self.stats.add(profiler)
+
+    def server_timing(self) -> str:
+        """Server-Timing header value; repeated span names are summed"""
+        totals: Dict[str, float] = {}
+        counts: Dict[str, int] = {}
+        with self._lock:
+            for name, seconds in self.spans:
+                totals[name] = totals.get(name, 0.0) + seconds
+                counts[name] = counts.get(name, 0) + 1
+
+        entries = []
+        for name, seconds in totals.items():
+            entry = f"{name};dur={seconds * 1000:.1f}"
+            if counts[name] > 1:
+                entry += f';desc="x{counts[name]}"'
+            entries.append(entry)
+        entries.append(f"total;dur={(time.perf_counter() - self.started) * 1000:.1f}")
+        return ", ".join(entries)
+
+
+def start_trace(profile: bool = False) -> Tuple[Trace, contextvars.Token]:
+    trace = Trace(profile=profile)
+    return trace, _current_trace.set(trace)
+
+
+def end_trace(token: contextvars.Token):
+    _current_trace.reset(token)
+
+
+@contextmanager
+def span(name: str):
+    """Time a block into the current request's trace; no-op when not tracing"""
+    trace = _current_trace.get()
+    if trace is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        trace.add_span(name, time.perf_counter() - started)
+
+
+def record_span(name: str, seconds: float):
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.add_span(name, seconds)
+
+
+def bind_to_request(func):
+    """
+    Wrap a blocking function for the threadpool so it keeps the caller's
+    trace and, when profiling, runs under cProfile in the worker thread
+    """
+    trace = _current_trace.get()
+    if trace is None:
+        return func
+
+    context = contextvars.copy_context()
+
+    def call(*args, **kwargs):
+        if not trace.profile:
+            return context.run(func, *args, **kwargs)
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Another profiler is already active (3.12+ allows only one)
+            return context.run(func, *args, **kwargs)
+        profiler.disable()
+        try:
+            return context.run(profiler.runcall, func, *args, **kwargs)
+        finally:
+            trace.add_profile(profiler)
+
+    return call
+
+
+class ProfileStore:
+    """Writes .prof files to a directory, keeping only the newest `keep`"""
+
+    def __init__(self, directory: str, keep: int = 50):
+        self.directory = directory
+        self.keep = keep
+        self._lock = threading.Lock()
+
+    def write(self, trace: Trace, method: str, path: str) -> Optional[str]:
+        if trace.stats is None:
+            return None
+
+        slug = re.sub(r"[^A-Za-z0-9]+", "_", path).strip("_") or "root"
+        name = f"{time.strftime('%Y%m%d-%H%M%S')}_{os.getpid()}_{method.lower()}_{slug}_{id(trace):x}.prof"
+
+        with self._lock:
+            os.makedirs(self.directory, exist_ok=True)
+            trace.stats.dump_stats(os.path.join(self.directory, name))
+            self._rotate()
+        return name
+
+    def _rotate(self):
+        files = sorted(
+            (f for f in os.listdir(self.directory) if f.endswith(".prof")),
+            key=lambda f: os.path.getmtime(os.path.join(self.directory, f)),
+        )
+        for stale in files[:-self.keep] if self.keep > 0 else files:
+            try:
+                os.remove(os.path.join(self.directory, stale))
+            except OSError:
+                pass
@@ -0,0 +1,5 @@
+# backend/tests/conftest.py - Make the backend modules importable as in main.py
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
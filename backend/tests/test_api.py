@@ -0,0 +1,182 @@
+import gzip
+
+import pytest
+
+pytest.importorskip("fastapi")
+pytest.importorskip("httpx")
+
+from fastapi.testclient import TestClient
+
+from config import Config
+from main import create_app
+from services.result_cache import content_hash
+
+
+class FakeGemini:
+    """Stands in for GeminiService: no SDK, no network, no quota"""
+
+    model_name = "fake"
+
+    def __init__(self):
+        self.calls = []
+        self.ready_in = 0.0
+
+    def generate_summary(self, text, level="quick"):
+        self.calls.append(("summary", level))
+        return f"{level} summary. It has two sentences."
+
+    def derive_summaries(self, source_summary, levels):
+        self.calls.append(("derive", tuple(levels)))
+        return {level: f"derived {level}." for level in levels}
+
+    def generate_mindmap(self, text):
+        self.calls.append(("mindmap", None))
+        return _graph("Topic", "Branch")
+
+    def seconds_until_ready(self):
+        return self.ready_in
+
+
+def _graph(central, *labels):
+    nodes = [{"id": "c", "label": central, "type": "central"}]
+    edges = []
+    for i, label in enumerate(labels):
+        nodes.append({"id": f"n{i}", "label": label, "type": "branch"})
+        edges.append({"id": f"e{i}", "source": "c", "target": f"n{i}", "label": "includes"})
+    return {"nodes": nodes, "edges": edges, "status": "success"}
+
+
+@pytest.fixture
+def gemini():
+    return FakeGemini()
+
+
+@pytest.fixture
+def client(gemini, monkeypatch, tmp_path):
+    monkeypatch.setattr(Config, "JOB_STORE_PATH", str(tmp_path / "jobs.sqlite3"))
+    with TestClient(create_app(gemini_factory=lambda: gemini, warmup=False)) as client:
+        yield client
+
+
+def test_merge_defaults_to_configured_max_nodes(client):
+    labels = [f"Concept {i}" for i in range(Config.MINDMAP_MERGE_MAX_NODES + 20)]
+    response = client.post("/api/mindmap/merge", json={"maps": [_graph("Root", *labels)]})
+
+    assert response.status_code == 200
+    assert len(response.json()["nodes"]) == Config.MINDMAP_MERGE_MAX_NODES
+
+
+@pytest.mark.parametrize("max_nodes", [0, Config.MINDMAP_MERGE_NODE_LIMIT + 1])
+def test_merge_rejects_out_of_range_max_nodes(client, max_nodes):
+    response = client.post("/api/mindmap/merge", json={"maps": [_graph("Root", "A")], "max_nodes": max_nodes})
+
+    assert response.status_code == 422
+
+
+def test_full_job_queue_answers_429(gemini, monkeypatch, tmp_path):
+    monkeypatch.setattr(Config, "JOB_STORE_PATH", str(tmp_path / "jobs.sqlite3"))
+    monkeypatch.setattr(Config, "JOB_WORKERS", 0)
+    monkeypatch.setattr(Config, "JOB_MAX_PENDING", 1)
+    with TestClient(create_app(gemini_factory=lambda: gemini, warmup=False)) as client:
+        first = client.post("/api/jobs", json={"text": "A long document about one thing."})
+        second = client.post("/api/jobs", json={"text": "A long document about another thing."})
+
+    assert first.status_code == 202
+    assert second.status_code == 429
+    assert int(second.headers["retry-after"]) >= 1
+
+
+def test_job_status_from_the_shared_store(client, monkeypatch):
+    created = client.post("/api/jobs", json={"text": "A long document about one thing."}).json()
+    # Stand in for a poll routed to a worker that doesn't run the job
+    monkeypatch.setattr(client.app.state.jobs, "_jobs", {})
+
+    response = client.get(created["status_url"])
+    assert response.status_code == 200
+    assert response.json()["job_id"] == created["job_id"]
+    assert client.get("/api/jobs/missing").status_code == 404
+
+
+TEXT = "A document that is long enough to summarize, about one subject."
+
+
+def test_all_levels_makes_one_full_text_call(client, gemini):
+    response = client.post("/api/summary", json={"text": TEXT, "level": "quick", "all_levels": True})
+
+    assert response.status_code == 200
+    body = response.json()
+    assert set(body["summaries"]) == {"quick", "detailed", "academic"}
+    assert body["summary"] == body["summaries"]["quick"]
+    # The default "local" derive mode spends no upstream call on shorter levels
+    assert gemini.calls == [("summary", "academic")]
+
+    for level in ("quick", "detailed", "academic"):
+        again = client.post("/api/summary", json={"text": TEXT, "level": level})
+        assert again.json()["cached"] is True
+        assert again.json()["summary"] == body["summaries"][level]
+    assert len(gemini.calls) == 1
+
+
+@pytest.mark.parametrize("ready_in, derive_calls", [(0.0, 1), (30.0, 0)])
+def test_model_derive_mode_does_not_wait_for_quota(client, gemini, monkeypatch, ready_in, derive_calls):
+    monkeypatch.setattr(Config, "SUMMARY_DERIVE_MODE", "model")
+    gemini.ready_in = ready_in
+
+    response = client.post("/api/summary", json={"text": TEXT, "level": "quick", "all_levels": True})
+
+    assert response.status_code == 200
+    assert [call for call in gemini.calls if call[0] == "derive"] == [("derive", ("quick", "detailed"))] * derive_calls
+
+
+def test_levels_validated_on_lookup_and_jobs(client):
+    assert client.post("/api/lookup", json={"hash": "0" * 64, "kind": "summary", "level": "brief"}).status_code == 400
+    assert client.post("/api/jobs", json={"text": TEXT, "level": "brief"}).status_code == 400
+
+
+def test_summary_lookup_hit_and_miss(client):
+    text = "Lookup  test\n\ndocument,   long enough to summarize."
+    lookup = {"hash": content_hash(text), "kind": "summary", "level": "quick"}
+
+    assert client.post("/api/lookup", json=lookup).json()["status"] == "miss"
+
+    # Uploaded compressed as text/plain; looked up by the hash of the raw text
+    client.post(
+        "/api/summary?level=quick",
+        content=gzip.compress(text.encode("utf-8")),
+        headers={"Content-Type": "text/plain; charset=utf-8", "Content-Encoding": "gzip"},
+    )
+    hit = client.post("/api/lookup", json=lookup).json()
+    assert hit["status"] == "success"
+    assert hit["cached"] is True
+    assert hit["summary"] == "quick summary. It has two sentences."
+
+    other_level = client.post("/api/lookup", json={**lookup, "level": "academic"}).json()
+    assert other_level["status"] == "miss"
+
+
+def test_mindmap_lookup_lays_out_a_cached_base_map(client, gemini):
+    text = "A mind map source text that is long enough."
+    client.post("/api/mindmap", json={"text": text})
+    assert gemini.calls == [("mindmap", None)]
+
+    lookup = {"hash": content_hash(text), "kind": "mindmap"}
+    plain = client.post("/api/lookup", json=lookup).json()
+    assert plain["status"] == "success"
+    assert all(node.get("position") is None for node in plain["nodes"])
+
+    laid_out = client.post("/api/lookup", json={**lookup, "layout": "radial"}).json()
+    assert laid_out["status"] == "success"
+    assert laid_out["nodes"][0]["position"] == {"x": 0.0, "y": 0.0}
+    assert all(node["position"] is not None for node in laid_out["nodes"])
+    # Laid out once, then cached next to the plain map
+    cache = client.app.state.result_cache
+    assert cache.get("mindmap", content_hash(text), "layout=radial") is not None
+    assert gemini.calls == [("mindmap", None)]
+
+
+def test_lookup_miss_and_bad_layout(client):
+    missing = client.post("/api/lookup", json={"hash": "A" * 64, "kind": "mindmap"}).json()
+    assert missing == {"status": "miss", "kind": "mindmap", "hash": "a" * 64}
+
+    bad = client.post("/api/lookup", json={"hash": "0" * 64, "kind": "mindmap", "layout": "spiral"})
+    assert bad.status_code == 400
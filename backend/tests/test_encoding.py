@@ -0,0 +1,56 @@
+import json
+
+import pytest
+
+pytest.importorskip("fastapi")
+
+from api.encoding import COMPACT_FORMAT, decode_compact_mindmap, encode_compact_mindmap
+
+
+NODES = [
+    {"id": "node_0", "label": "Machine Learning", "type": "central", "size": 30,
+     "position": {"x": 0.0, "y": 0.0}},
+    {"id": "node_1", "label": "Supervised", "type": "branch", "size": 24,
+     "position": {"x": 160.0, "y": -0.5}},
+    {"id": "node_2", "label": "Regression", "type": "detail",
+     "position": {"x": 320.0, "y": 12.5}},
+    {"id": "node_3", "label": "Unlabelled", "position": {"x": -160.0, "y": 0.0}},
+]
+EDGES = [
+    {"id": "edge_0", "source": "node_0", "target": "node_1", "label": "includes"},
+    {"id": "edge_1", "source": "node_1", "target": "node_2", "label": "includes"},
+    {"id": "edge_2", "source": "node_2", "target": "node_3", "dashed": True},
+]
+
+
+def test_round_trip_preserves_nodes_and_edges():
+    encoded = encode_compact_mindmap(NODES, EDGES)
+    # Goes over the wire as JSON
+    decoded = decode_compact_mindmap(json.loads(json.dumps(encoded)))
+
+    assert encoded["format"] == COMPACT_FORMAT
+    assert decoded == {"nodes": NODES, "edges": EDGES}
+
+
+def test_round_trip_without_positions():
+    nodes = [{k: v for k, v in node.items() if k != "position"} for node in NODES]
+    encoded = encode_compact_mindmap(nodes, EDGES)
+
+    assert "position" not in encoded["nodes"]
+    assert decode_compact_mindmap(encoded)["nodes"] == nodes
+
+
+def test_interns_repeated_types_and_labels():
+    encoded = encode_compact_mindmap(NODES, EDGES)
+
+    assert encoded["types"] == ["central", "branch", "detail"]
+    assert encoded["labels"] == ["includes"]
+    assert encoded["edge_label"] == [0, 0, -1]
+    assert encoded["dashed"] == [2]
+
+
+def test_edges_to_unknown_nodes_are_dropped_and_ids_renumbered():
+    edges = [{"id": "edge_9", "source": "node_0", "target": "missing"}] + EDGES
+    decoded = decode_compact_mindmap(encode_compact_mindmap(NODES, edges))
+
+    assert decoded["edges"] == EDGES
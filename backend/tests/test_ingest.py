@@ -0,0 +1,143 @@
+import asyncio
+import gzip
+import json
+import zlib
+
+import pytest
+
+pytest.importorskip("fastapi")
+pytest.importorskip("httpx")
+
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+from starlette.requests import Request
+
+from api.ingest import read_plain_text, text_body
+from api.models import SummaryRequest
+from services.result_cache import content_hash
+
+MAX_BYTES = 64 * 1024
+
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+
+    @app.post("/echo")
+    async def echo(request: SummaryRequest = Depends(text_body(SummaryRequest, MAX_BYTES))):
+        return request.model_dump()
+
+    return TestClient(app)
+
+
+def _post(client, body: bytes, content_type: str, encoding: str = None, query: str = ""):
+    headers = {"Content-Type": content_type}
+    if encoding:
+        headers["Content-Encoding"] = encoding
+    return client.post(f"/echo{query}", content=body, headers=headers)
+
+
+def test_json_body_is_normalized(client):
+    response = _post(client, json.dumps({"text": " a \n\n b\t", "level": "detailed"}).encode(), "application/json")
+
+    assert response.status_code == 200
+    assert response.json() == {"text": "a b", "level": "detailed", "all_levels": False}
+
+
+def test_compressed_plain_text_with_query_fields(client):
+    body = gzip.compress("Hello   world.\n\nSecond\tline ".encode("utf-8"))
+    response = _post(client, body, "text/plain; charset=utf-8", "gzip", "?level=academic&all_levels=true")
+
+    assert response.status_code == 200
+    assert response.json() == {"text": "Hello world. Second line", "level": "academic", "all_levels": True}
+
+
+def test_deflate_json(client):
+    body = zlib.compress(json.dumps({"text": "compressed json"}).encode())
+    response = _post(client, body, "application/json", "deflate")
+
+    assert response.status_code == 200
+    assert response.json()["text"] == "compressed json"
+
+
+@pytest.mark.parametrize("body", [b'{"text": ', b"not json", b""])
+def test_malformed_json_is_422(client, body):
+    response = _post(client, body, "application/json")
+
+    assert response.status_code == 422
+    assert all("input" not in error for error in response.json()["detail"])
+
+
+def test_compressed_malformed_json_is_422(client):
+    response = _post(client, gzip.compress(b'{"text": '), "application/json", "gzip")
+
+    assert response.status_code == 422
+    assert all("input" not in error for error in response.json()["detail"])
+
+
+def test_invalid_query_field_is_422(client):
+    response = _post(client, b"some text", "text/plain", query="?all_levels=maybe")
+
+    assert response.status_code == 422
+    assert response.json()["detail"][0]["loc"] == ["query", "all_levels"]
+
+
+def test_decompression_is_capped(client):
+    bomb = gzip.compress(b"a" * (MAX_BYTES * 50))
+    assert len(bomb) < MAX_BYTES
+
+    assert _post(client, bomb, "text/plain", "gzip").status_code == 413
+
+
+def test_uncompressed_body_is_capped(client):
+    assert _post(client, b"a" * (MAX_BYTES + 1), "text/plain").status_code == 413
+    assert _post(client, b"a" * MAX_BYTES, "text/plain").status_code == 200
+
+
+def test_truncated_and_corrupt_streams_are_400(client):
+    body = gzip.compress(b"some text that gets cut off")
+
+    assert _post(client, body[:-8], "text/plain", "gzip").status_code == 400
+    assert _post(client, b"not gzip at all", "text/plain", "gzip").status_code == 400
+
+
+def test_unsupported_encoding_and_media_type_are_415(client):
+    assert _post(client, b"text", "text/plain", "compress").status_code == 415
+    assert _post(client, b"<p>text</p>", "text/html").status_code == 415
+
+
+def test_invalid_utf8_is_400(client):
+    assert _post(client, b"\xff\xfe" * 10, "text/plain").status_code == 400
+
+
+def _chunked_request(chunks, content_type="text/plain; charset=utf-8"):
+    """A Request whose body arrives as separate ASGI messages"""
+    messages = [{"type": "http.request", "body": chunk, "more_body": True} for chunk in chunks]
+    messages.append({"type": "http.request", "body": b"", "more_body": False})
+
+    async def receive():
+        return messages.pop(0)
+
+    scope = {
+        "type": "http",
+        "method": "POST",
+        "path": "/",
+        "query_string": b"",
+        "headers": [(b"content-type", content_type.encode())],
+    }
+    return Request(scope, receive)
+
+
+@pytest.mark.parametrize("chunks", [
+    [b"Intro  text", b"  \n\n  ", b"middle\t", b"\tend.  "],
+    # "é" (2 bytes) and a no-break space (2 bytes) split across chunks
+    [b"caf\xc3", b"\xa9 ", b" au\xc2", b"\xa0lait \n", b"\n"],
+    [b"   ", b"", b"only\r\n", b"\r\nwords   "],
+])
+def test_chunked_text_hashes_like_json(client, chunks):
+    raw = b"".join(chunks).decode("utf-8")
+    streamed = asyncio.run(read_plain_text(_chunked_request(chunks), MAX_BYTES))
+    posted = _post(client, json.dumps({"text": raw}).encode(), "application/json").json()["text"]
+
+    assert streamed == posted
+    assert content_hash(streamed, normalized=True) == content_hash(raw)
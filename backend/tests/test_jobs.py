@@ -0,0 +1,222 @@
+import asyncio
+
+import pytest
+
+from services import jobs as jobs_module
+from services.chunking import estimate_tokens
+from services.job_store import JobStore
+from services.jobs import JobManager, JobQueueFull
+from services.quota import QuotaExhausted
+from services.result_cache import MINDMAP_VARIANT, ResultCache, content_hash, normalize_text
+from services.scheduler import PriorityScheduler, SchedulerRejected
+
+TEXT = " ".join(f"Sentence number {i} talks about topic {i}." for i in range(12))
+
+
+def run(coro):
+    return asyncio.run(asyncio.wait_for(coro, timeout=10))
+
+
+class FakeService:
+    """Stands in for GeminiService: records calls, answers instantly"""
+
+    def __init__(self, mindmap_status="success", failures=()):
+        self.mindmap_status = mindmap_status
+        # Exceptions raised by the first calls, in order
+        self.failures = list(failures)
+        self.calls = []
+
+    def _fail(self):
+        if self.failures:
+            raise self.failures.pop(0)
+
+    def generate_summary(self, text, level="quick"):
+        self._fail()
+        summary = f"{level} summary of {len(text)} characters."
+        self.calls.append((text, level, summary))
+        return summary
+
+    def generate_mindmap(self, text):
+        self._fail()
+        self.calls.append((text, None, None))
+        return {
+            "nodes": [
+                {"id": "c", "label": "Topic", "type": "central"},
+                {"id": "n0", "label": f"Part {len(self.calls)}", "type": "branch"},
+            ],
+            "edges": [{"source": "c", "target": "n0", "label": "includes"}],
+            "status": self.mindmap_status,
+        }
+
+
+def _manager(service, cache=None, **kwargs):
+    kwargs.setdefault("chunk_chars", 100)
+    return JobManager(
+        PriorityScheduler(slots=1, initial_service_time=0.0),
+        lambda: service,
+        cache or ResultCache(),
+        **kwargs,
+    )
+
+
+async def _follow(manager, job_id):
+    """Every snapshot watch() yields until the job ends"""
+    return [snapshot async for snapshot in manager.watch(job_id) if snapshot is not None]
+
+
+def test_cache_hit_at_submit_skips_the_queue():
+    async def scenario():
+        cache = ResultCache()
+        digest = content_hash(normalize_text(TEXT), normalized=True)
+        cache.put("summary", digest, "quick", {"summary": "cached"})
+        service = FakeService()
+        manager = _manager(service, cache, workers=0)
+        await manager.start()
+
+        job = manager.submit(TEXT, "quick")
+        await manager.stop()
+        return job, service, manager
+
+    job, service, manager = run(scenario())
+    assert job.status == "done"
+    assert job.stage == "cached"
+    assert job.result == {"summary": "cached"}
+    assert service.calls == []
+    assert manager.get_stats()["pending"] == 0
+
+
+def test_full_queue_raises_with_retry_after():
+    async def scenario():
+        manager = _manager(FakeService(), workers=0, max_pending=1)
+        await manager.start()
+        manager.submit(TEXT)
+        with pytest.raises(JobQueueFull) as full:
+            manager.submit(TEXT + " More.")
+        await manager.stop()
+        return full.value
+
+    assert run(scenario()).retry_after >= 0
+
+
+def test_multi_chunk_summary_maps_and_reduces():
+    async def scenario():
+        service = FakeService()
+        cache = ResultCache()
+        manager = _manager(service, cache)
+        await manager.start()
+        job = manager.submit(TEXT, "academic")
+        snapshots = await _follow(manager, job.id)
+        await manager.stop()
+        return job, service, cache, snapshots
+
+    job, service, cache, snapshots = run(scenario())
+    final = snapshots[-1]
+
+    assert final["status"] == "done"
+    assert final["chunks_total"] > 1
+    assert final["chunks_done"] == final["chunks_total"]
+    assert final["tokens_used"] == sum(
+        estimate_tokens(text) + estimate_tokens(summary) for text, _, summary in service.calls
+    )
+    # One detailed summary per chunk (plus any reduce passes), then the requested level
+    levels = [level for _, level, _ in service.calls]
+    assert levels[:final["chunks_total"]] == ["detailed"] * final["chunks_total"]
+    assert levels[-1] == "academic"
+    assert final["result"]["summary"] == service.calls[-1][2]
+    assert cache.get("summary", job.digest, "academic") == final["result"]
+
+
+def test_watch_yields_progress_then_done():
+    async def scenario():
+        manager = _manager(FakeService())
+        await manager.start()
+        job = manager.submit(TEXT, "quick")
+        snapshots = await _follow(manager, job.id)
+        await manager.stop()
+        return snapshots
+
+    snapshots = run(scenario())
+    statuses = [snapshot["status"] for snapshot in snapshots]
+
+    assert statuses[0] == "queued"
+    assert "running" in statuses
+    assert statuses[-1] == "done"
+    assert statuses.count("done") == 1
+    # Progress only grows, and only the final snapshot carries the result
+    done = [snapshot["chunks_done"] for snapshot in snapshots]
+    assert done == sorted(done)
+    assert ["result" in snapshot for snapshot in snapshots].count(True) == 1
+
+
+@pytest.mark.parametrize("status, cached", [("success", True), ("fallback", False)])
+def test_only_real_mind_maps_are_cached(status, cached):
+    async def scenario():
+        cache = ResultCache()
+        manager = _manager(FakeService(mindmap_status=status), cache)
+        await manager.start()
+        job = manager.submit(TEXT, kind="mindmap")
+        snapshots = await _follow(manager, job.id)
+        await manager.stop()
+        return job, cache, snapshots[-1]
+
+    job, cache, final = run(scenario())
+    assert final["status"] == "done"
+    assert "cacheable" not in final["result"]
+    assert (cache.get("mindmap", job.digest, MINDMAP_VARIANT) is not None) == cached
+
+
+@pytest.mark.parametrize("error", [
+    SchedulerRejected("Estimated wait exceeds deadline", 0.2),
+    QuotaExhausted(45.0),
+])
+def test_call_backs_off_and_retries(monkeypatch, error):
+    slept = []
+    real_sleep = asyncio.sleep
+
+    async def fake_sleep(seconds):
+        slept.append(seconds)
+        await real_sleep(0)
+
+    async def scenario():
+        monkeypatch.setattr(jobs_module.asyncio, "sleep", fake_sleep)
+        service = FakeService(failures=[error])
+        manager = _manager(service, chunk_chars=10000)
+        await manager.start()
+        job = manager.submit(TEXT, "quick")
+        snapshots = await _follow(manager, job.id)
+        await manager.stop()
+        return service, manager, snapshots[-1]
+
+    service, manager, final = run(scenario())
+    assert final["status"] == "done"
+    assert len(service.calls) == 1
+    # Waits at least 1s, at most 30s, and never while holding the slot
+    assert slept == [min(max(error.retry_after, 1.0), 30.0)]
+    assert manager.scheduler.get_stats()["active"] == 0
+
+
+def test_other_workers_see_the_job_through_the_store(tmp_path):
+    async def scenario():
+        store_path = str(tmp_path / "jobs.sqlite3")
+        owner = _manager(FakeService(), store=JobStore(store_path))
+        # Another worker process: no job workers of its own, same store file
+        other = _manager(FakeService(), workers=0, store=JobStore(store_path))
+        await owner.start()
+        await other.start()
+
+        job = owner.submit(TEXT, "quick")
+        await owner.flush()
+        assert other.get(job.id) is None
+        remote = [s async for s in other.watch(job.id, poll=0.01) if s is not None]
+        looked_up = await other.lookup(job.id)
+
+        await owner.stop()
+        await other.stop()
+        return job, remote, looked_up, await other.lookup("missing")
+
+    job, remote, looked_up, missing = run(scenario())
+    assert remote[-1]["status"] == "done"
+    assert remote[-1]["result"] == job.result
+    assert all("result" not in snapshot for snapshot in remote[:-1])
+    assert looked_up == job.snapshot()
+    assert missing is None
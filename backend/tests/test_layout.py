@@ -0,0 +1,76 @@
+import pytest
+
+pytest.importorskip("numpy")
+
+from services.layout import FORCE_MAX_NODES, LAYOUTS, apply_layout
+
+
+def _tree(count):
+    """A central node, branches under it, details under the branches"""
+    if count == 0:
+        return {"nodes": [], "edges": []}
+    nodes = [{"id": "n0", "label": "Root", "type": "central"}]
+    edges = []
+    for i in range(1, count):
+        parent = 0 if i <= 4 else (i - 1) % 4 + 1
+        nodes.append({"id": f"n{i}", "label": f"Node {i}", "type": "branch" if parent == 0 else "detail"})
+        edges.append({"id": f"e{i}", "source": f"n{parent}", "target": f"n{i}"})
+    # One "related to" edge and one node with no edges at all
+    if count > 6:
+        edges.append({"id": "related", "source": "n5", "target": "n6", "dashed": True})
+        edges = [edge for edge in edges if edge["target"] != f"n{count - 1}"]
+    return {"nodes": nodes, "edges": edges}
+
+
+@pytest.mark.parametrize("layout", LAYOUTS)
+def test_every_node_gets_a_position_and_root_is_centred(layout):
+    result = apply_layout(_tree(20), layout)
+
+    assert result["layout"] == layout
+    assert len(result["nodes"]) == 20
+    positions = [node["position"] for node in result["nodes"]]
+    assert positions[0] == {"x": 0.0, "y": 0.0}
+    assert all(set(p) == {"x", "y"} for p in positions)
+    # Everything else is placed away from the root
+    assert all(p["x"] ** 2 + p["y"] ** 2 > 1.0 for p in positions[1:])
+
+
+@pytest.mark.parametrize("layout", LAYOUTS)
+def test_layout_is_deterministic(layout):
+    assert apply_layout(_tree(25), layout) == apply_layout(_tree(25), layout)
+
+
+@pytest.mark.parametrize("layout", LAYOUTS)
+@pytest.mark.parametrize("count", [0, 1, 2])
+def test_tiny_maps(layout, count):
+    result = apply_layout(_tree(count), layout)
+
+    assert len(result["nodes"]) == count
+    if count:
+        assert result["nodes"][0]["position"] == {"x": 0.0, "y": 0.0}
+    if count == 2:
+        assert result["nodes"][1]["position"] != {"x": 0.0, "y": 0.0}
+
+
+def test_radial_places_levels_on_rings():
+    nodes = apply_layout(_tree(9), "radial")["nodes"]
+    radius = [round((n["position"]["x"] ** 2 + n["position"]["y"] ** 2) ** 0.5) for n in nodes]
+
+    assert radius[0] == 0
+    assert set(radius[1:5]) == {160}
+    assert set(radius[5:8]) == {320}
+    # The disconnected node hangs off the root
+    assert radius[8] == 160
+
+
+def test_force_falls_back_to_radial_for_large_maps():
+    mindmap = _tree(FORCE_MAX_NODES + 1)
+    result = apply_layout(mindmap, "force")
+
+    assert result["layout"] == "radial"
+    assert result["nodes"] == apply_layout(mindmap, "radial")["nodes"]
+
+
+def test_unknown_layout():
+    with pytest.raises(ValueError):
+        apply_layout(_tree(3), "spiral")
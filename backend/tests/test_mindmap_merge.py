@@ -0,0 +1,73 @@
+import pytest
+
+from services.mindmap_merge import merge_mindmaps, normalize_label
+
+
+def _graph(central, *labels):
+    nodes = [{"id": "c", "label": central, "type": "central"}]
+    edges = []
+    for i, label in enumerate(labels):
+        nodes.append({"id": f"n{i}", "label": label, "type": "branch"})
+        edges.append({"source": "c", "target": f"n{i}", "label": "includes"})
+    return {"nodes": nodes, "edges": edges}
+
+
+def _labels(merged):
+    return sorted(node["label"] for node in merged["nodes"])
+
+
+@pytest.mark.parametrize("first, second", [
+    ("Neural Networks", "neural network"),
+    ("Back-propagation", "Backpropagation"),
+    ("Convolutional Neural Network", "Convolutional Nueral Network"),
+    ("Type 1 Diabetes", "type-1 diabetes"),
+    ("World War II", "world war II"),
+])
+def test_true_duplicates_merge(first, second):
+    merged = merge_mindmaps([_graph("Topic", first), _graph("Topic", second)])
+
+    assert merged["total_nodes"] == 2
+    assert _labels(merged) == sorted(["Topic", first])
+
+
+@pytest.mark.parametrize("first, second", [
+    ("World War I", "World War II"),
+    ("Type 1 Diabetes", "Type 2 Diabetes"),
+    ("Phase 2 Trials", "Phase 3 Trials"),
+    ("Vitamin C", "Vitamin D"),
+    ("Windows 10", "Windows 11"),
+])
+def test_distinct_numbered_concepts_do_not_merge(first, second):
+    merged = merge_mindmaps([_graph("Topic", first), _graph("Topic", second)])
+
+    assert merged["total_nodes"] == 3
+    assert _labels(merged) == sorted(["Topic", first, second])
+
+
+def test_single_central_node_and_no_parallel_edges():
+    merged = merge_mindmaps([
+        _graph("Machine Learning", "Supervised Learning", "Regression"),
+        _graph("machine learning", "supervised learning", "Clustering"),
+        _graph("Deep Learning", "Neural Networks"),
+    ])
+
+    centrals = [node for node in merged["nodes"] if node["type"] == "central"]
+    assert [node["label"] for node in centrals] == ["Machine Learning"]
+    pairs = [(edge["source"], edge["target"]) for edge in merged["edges"]]
+    assert len(pairs) == len(set(pairs))
+    assert merged["merged_from"] == 3
+
+
+def test_prunes_to_max_nodes_keeping_the_root_connected():
+    labels = [f"Concept {i}" for i in range(30)]
+    merged = merge_mindmaps([_graph("Root", *labels)], max_nodes=10)
+
+    assert merged["total_nodes"] == 10
+    assert merged["nodes"][0]["label"] == "Root"
+    ids = {node["id"] for node in merged["nodes"]}
+    assert all(edge["source"] in ids and edge["target"] in ids for edge in merged["edges"])
+
+
+def test_normalize_label():
+    assert normalize_label("The Neural Networks!") == "neural network"
+    assert normalize_label("Class") == "class"
@@ -0,0 +1,130 @@
+import pytest
+
+from services import quota as quota_module
+from services.quota import QuotaCoordinator, QuotaExhausted
+
+# 10:00:00 UTC on some day, so minute and day boundaries are easy to reason about
+START = 1_700_000_000 - 1_700_000_000 % 86400 + 10 * 3600
+
+
+class FakeClock:
+    def __init__(self, now: float):
+        self.now = now
+        self.slept = 0.0
+
+    def time(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float):
+        self.slept += seconds
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock(START)
+    monkeypatch.setattr(quota_module, "time", fake)
+    return fake
+
+
+@pytest.fixture
+def ledger(tmp_path):
+    return str(tmp_path / "quota.sqlite3")
+
+
+def test_workers_share_the_per_minute_budget(clock, ledger):
+    # Two coordinators on one ledger stand in for two worker processes
+    first = QuotaCoordinator(ledger, requests_per_minute=3, lease_requests=2, max_wait=0)
+    second = QuotaCoordinator(ledger, requests_per_minute=3, lease_requests=2, max_wait=0)
+
+    first.acquire()
+    first.acquire()  # from the local lease
+    second.acquire()  # only one request left to lease
+    with pytest.raises(QuotaExhausted):
+        second.acquire()
+    with pytest.raises(QuotaExhausted):
+        first.acquire()
+
+    assert first.usage()["requests_this_minute"] == 3
+
+
+def test_scopes_do_not_share_budget(clock, ledger):
+    first = QuotaCoordinator(ledger, scope="key-a", requests_per_minute=1, max_wait=0)
+    second = QuotaCoordinator(ledger, scope="key-b", requests_per_minute=1, max_wait=0)
+
+    first.acquire()
+    second.acquire()
+
+
+def test_waits_for_the_next_minute_within_max_wait(clock, ledger):
+    clock.now += 15
+    coordinator = QuotaCoordinator(ledger, requests_per_minute=1, max_wait=60)
+
+    assert coordinator.acquire() == 0.0
+    waited = coordinator.acquire()
+
+    assert waited == pytest.approx(45.0)
+    assert clock.slept == pytest.approx(45.0)
+
+
+def test_daily_exhaustion_raises_instead_of_sleeping(clock, ledger):
+    coordinator = QuotaCoordinator(ledger, requests_per_minute=0, requests_per_day=1, max_wait=60)
+
+    coordinator.acquire()
+    with pytest.raises(QuotaExhausted) as exhausted:
+        coordinator.acquire()
+
+    assert exhausted.value.retry_after == pytest.approx(14 * 3600)
+    assert clock.slept == 0.0
+    # The scheduler's wait estimate now knows about the block
+    assert coordinator.seconds_until_available() == pytest.approx(14 * 3600)
+
+
+def test_token_budget_per_minute(clock, ledger):
+    coordinator = QuotaCoordinator(
+        ledger, requests_per_minute=0, tokens_per_minute=1000,
+        lease_requests=5, lease_tokens=500, max_wait=0,
+    )
+
+    coordinator.acquire(400)
+    coordinator.acquire(400)  # needs a second lease
+    with pytest.raises(QuotaExhausted):
+        coordinator.acquire(400)
+    assert coordinator.usage()["tokens_this_minute"] == 1000
+
+
+def test_budget_comes_back_in_the_next_minute(clock, ledger):
+    coordinator = QuotaCoordinator(ledger, requests_per_minute=1, max_wait=0)
+
+    coordinator.acquire()
+    with pytest.raises(QuotaExhausted):
+        coordinator.acquire()
+    clock.now += 60
+    coordinator.acquire()
+
+    usage = coordinator.usage()
+    assert usage["requests_this_minute"] == 1
+    assert usage["requests_today"] == 2
+
+
+def test_estimate_is_non_zero_once_the_minute_budget_is_spent(clock, ledger):
+    clock.now += 20
+    coordinator = QuotaCoordinator(ledger, requests_per_minute=1, max_wait=0)
+
+    assert coordinator.seconds_until_available() == 0.0
+    coordinator.acquire()
+
+    # Nobody has blocked yet, but the next call would wait for the window
+    assert coordinator.seconds_until_available() == pytest.approx(40.0)
+    clock.now += 40
+    assert coordinator.seconds_until_available() == 0.0
+
+
+def test_estimate_stays_zero_while_the_window_has_budget(clock, ledger):
+    coordinator = QuotaCoordinator(ledger, requests_per_minute=10, lease_requests=2, max_wait=0)
+
+    coordinator.acquire()
+    coordinator.acquire()
+
+    # The lease is spent, but the ledger still has budget for this minute
+    assert coordinator.seconds_until_available() == 0.0
@@ -0,0 +1,27 @@
+from services.registry import LazyService
+
+
+def test_builds_once_on_first_get():
+    calls = []
+    service = LazyService("demo", lambda: calls.append(1) or object())
+
+    assert service.peek() is None
+    first = service.get()
+    assert first is not None
+    assert service.get() is first
+    assert calls == [1]
+
+
+def test_failed_build_is_recorded_and_not_retried():
+    calls = []
+
+    def factory():
+        calls.append(1)
+        raise ImportError("No module named 'google.generativeai'")
+
+    service = LazyService("gemini", factory)
+
+    assert service.get() is None
+    assert service.get() is None
+    assert calls == [1]
+    assert service.error == "ImportError: No module named 'google.generativeai'"
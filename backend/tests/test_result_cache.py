@@ -0,0 +1,49 @@
+import pytest
+
+from services.result_cache import TextNormalizer, content_hash, normalize_text
+
+SAMPLES = [
+    "plain text already normalized",
+    "  leading and trailing  ",
+    "runs \t\n of \r\n\n  mixed   whitespace",
+    "non-breaking  spaces and　ideographic ones",
+    "tabs\tand\vform\ffeeds",
+    "\n\n\n",
+    "",
+]
+
+
+def _normalize_in_pieces(text, cuts):
+    normalizer = TextNormalizer()
+    start = 0
+    for cut in list(cuts) + [len(text)]:
+        normalizer.feed(text[start:cut])
+        start = cut
+    return normalizer.result()
+
+
+@pytest.mark.parametrize("text", SAMPLES)
+def test_every_two_way_split_matches_normalize_text(text):
+    expected = normalize_text(text)
+    for cut in range(len(text) + 1):
+        assert _normalize_in_pieces(text, [cut]) == expected, cut
+
+
+@pytest.mark.parametrize("text", SAMPLES)
+def test_one_character_pieces_match_normalize_text(text):
+    assert _normalize_in_pieces(text, range(1, len(text))) == normalize_text(text)
+
+
+def test_whitespace_run_split_across_several_pieces():
+    pieces = ["word", " ", "\t", "\n", " ", "next ", " ", " last"]
+    normalizer = TextNormalizer()
+    for piece in pieces:
+        normalizer.feed(piece)
+
+    assert normalizer.result() == "word next last"
+
+
+def test_content_hash_ignores_whitespace_layout():
+    assert content_hash(" a\n\nb\tc ") == content_hash("a b c")
+    assert content_hash("a b c", normalized=True) == content_hash("a b c")
+    assert content_hash("a b c") != content_hash("a bc")
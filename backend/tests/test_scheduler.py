@@ -0,0 +1,166 @@
+import asyncio
+
+import pytest
+
+from services import scheduler as scheduler_module
+from services.scheduler import PriorityScheduler, SchedulerRejected
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+async def _hold(scheduler, **kwargs):
+    """Acquire a slot and keep it; returns the ticket"""
+    return await scheduler.acquire(deadline=float("inf"), **kwargs)
+
+
+async def _served_order(scheduler, holder, requests):
+    """Queue (priority, client) pairs behind `holder` and record the service order"""
+    order = []
+
+    async def request(priority, client_id, tag):
+        async with scheduler.slot(priority, client_id, deadline=float("inf")):
+            order.append(tag)
+
+    tasks = [asyncio.create_task(request(p, c, f"{p}:{c}:{i}")) for i, (p, c) in enumerate(requests)]
+    await asyncio.sleep(0)  # let every request queue up
+    scheduler.release(holder)
+    await asyncio.gather(*tasks)
+    return order
+
+
+def test_strict_priority_between_classes():
+    async def scenario():
+        scheduler = PriorityScheduler(slots=1)
+        holder = await _hold(scheduler)
+        order = await _served_order(scheduler, holder, [
+            ("probe", "a"), ("bulk", "a"), ("interactive", "a"),
+        ])
+        return [tag.split(":")[0] for tag in order]
+
+    assert run(scenario()) == ["interactive", "bulk", "probe"]
+
+
+def test_weighted_fair_queuing_within_a_class():
+    async def scenario():
+        scheduler = PriorityScheduler(slots=1, client_weights={"heavy": 2.0})
+        holder = await _hold(scheduler)
+        requests = [("bulk", "heavy")] * 6 + [("bulk", "light")] * 3
+        order = await _served_order(scheduler, holder, requests)
+        return [tag.split(":")[1] for tag in order]
+
+    order = run(scenario())
+    # A busy client can't push the other to the back: in the first six
+    # slots the weight-2 client gets four and the weight-1 client two
+    assert order[:6].count("heavy") == 4
+    assert order[:6].count("light") == 2
+
+
+def test_rejects_when_estimate_exceeds_deadline():
+    async def scenario():
+        scheduler = PriorityScheduler(slots=1, initial_service_time=10.0)
+        await _hold(scheduler)
+        with pytest.raises(SchedulerRejected) as rejected:
+            await scheduler.acquire("interactive", deadline=1.0)
+        return scheduler, rejected.value
+
+    scheduler, error = run(scenario())
+    assert error.retry_after == pytest.approx(10.0)
+    assert scheduler.rejected == 1
+    assert scheduler.get_stats()["queued"]["interactive"] == 0
+
+
+def test_rejects_when_queue_is_full():
+    async def scenario():
+        scheduler = PriorityScheduler(slots=1, max_queue=1, initial_service_time=0.0)
+        await _hold(scheduler)
+        waiting = asyncio.create_task(scheduler.acquire("bulk", deadline=float("inf")))
+        await asyncio.sleep(0)
+        with pytest.raises(SchedulerRejected, match="queue is full"):
+            await scheduler.acquire("interactive", deadline=float("inf"))
+        waiting.cancel()
+        await asyncio.gather(waiting, return_exceptions=True)
+
+    run(scenario())
+
+
+def test_deadline_expiry_while_queued_keeps_counts_consistent():
+    async def scenario():
+        scheduler = PriorityScheduler(slots=1, initial_service_time=0.0)
+        holder = await _hold(scheduler)
+        with pytest.raises(SchedulerRejected, match="expired"):
+            await scheduler.acquire("interactive", deadline=0.01)
+        assert scheduler.get_stats()["queued"]["interactive"] == 0
+
+        scheduler.release(holder)
+        assert scheduler.get_stats()["active"] == 0
+        # The abandoned ticket must not be handed the freed slot
+        ticket = await scheduler.acquire("interactive", deadline=1.0)
+        assert scheduler.get_stats()["active"] == 1
+        scheduler.release(ticket)
+
+    run(scenario())
+
+
+def test_cancel_while_queued_keeps_counts_consistent():
+    async def scenario():
+        scheduler = PriorityScheduler(slots=1)
+        holder = await _hold(scheduler)
+        waiting = asyncio.create_task(scheduler.acquire("bulk", deadline=float("inf")))
+        await asyncio.sleep(0)
+        assert scheduler.get_stats()["queued"]["bulk"] == 1
+
+        waiting.cancel()
+        await asyncio.gather(waiting, return_exceptions=True)
+        assert scheduler.get_stats()["queued"]["bulk"] == 0
+
+        scheduler.release(holder)
+        assert scheduler.get_stats()["active"] == 0
+
+    run(scenario())
+
+
+def test_cancel_after_slot_granted_releases_it():
+    async def scenario():
+        scheduler = PriorityScheduler(slots=1)
+        holder = await _hold(scheduler)
+        waiting = asyncio.create_task(scheduler.acquire("bulk", deadline=float("inf")))
+        await asyncio.sleep(0)
+
+        # Slot handed over, then the waiter is cancelled before it resumes
+        scheduler.release(holder)
+        waiting.cancel()
+        await asyncio.gather(waiting, return_exceptions=True)
+        assert scheduler.get_stats()["active"] == 0
+        assert scheduler.get_stats()["queued"]["bulk"] == 0
+
+    run(scenario())
+
+
+def test_slot_granted_as_deadline_fires_is_kept(monkeypatch):
+    async def scenario():
+        scheduler = PriorityScheduler(slots=1, initial_service_time=0.0)
+        holder = await _hold(scheduler)
+
+        async def wait_times_out_after_dispatch(futures, timeout=None):
+            # The holder finishes in the same tick the timeout fires
+            scheduler.release(holder)
+            return set(), set(futures)
+
+        monkeypatch.setattr(scheduler_module.asyncio, "wait", wait_times_out_after_dispatch)
+        ticket = await scheduler.acquire("interactive", deadline=0.01)
+        monkeypatch.undo()
+
+        stats = scheduler.get_stats()
+        assert stats["active"] == 1
+        assert stats["queued"]["interactive"] == 0
+        scheduler.release(ticket)
+        assert scheduler.get_stats()["active"] == 0
+
+    run(scenario())
+
+
+def test_ready_delay_counts_toward_an_idle_estimate():
+    scheduler = PriorityScheduler(slots=1, ready_delay=lambda: 42.0)
+    assert scheduler.estimate_wait("interactive") == pytest.approx(42.0)
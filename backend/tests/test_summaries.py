@@ -0,0 +1,147 @@
+import pytest
+
+from services.extractive import LEVEL_SENTENCES, compress_to_level, split_sentences
+from services.gemini_service import GeminiService
+from services.quota import QuotaCoordinator
+
+ACADEMIC = (
+    "- Photosynthesis converts light energy into chemical energy in plants.\n"
+    "- The light reactions of photosynthesis take place in the thylakoid membranes.\n"
+    "- Chlorophyll absorbs light mostly in the blue and red wavelengths.\n"
+    "- The Calvin cycle fixes carbon dioxide into sugars using chemical energy.\n"
+    "- The author grew up in a small town by the sea.\n"
+    "1. Photosynthesis rates depend on light intensity and carbon dioxide levels.\n"
+    "2. Plants store the chemical energy from photosynthesis as starch.\n"
+    "3. Oxygen is released as a by-product of the light reactions.\n"
+    "4. Chlorophyll gives plants their green colour.\n"
+    "5. The weather that year was unusually mild.\n"
+    "6. Photosynthesis in algae follows the same light and carbon reactions.\n"
+    "7. Energy from photosynthesis ultimately feeds most food chains."
+)
+
+
+class FakeResponse:
+    def __init__(self, text):
+        self.text = text
+
+
+class FakeModel:
+    def __init__(self, reply=None, error=None):
+        self.reply = reply
+        self.error = error
+        self.prompts = []
+
+    def generate_content(self, prompt, generation_config=None):
+        self.prompts.append(prompt)
+        if self.error:
+            raise self.error
+        return FakeResponse(self.reply)
+
+
+@pytest.fixture
+def service(tmp_path):
+    quota = QuotaCoordinator(str(tmp_path / "quota.sqlite3"), requests_per_minute=0, requests_per_day=0)
+    gemini = GeminiService(model_name="fake", api_key="", quota=quota)
+    gemini._model = FakeModel()
+    return gemini
+
+
+# ----------------------------------------------------------------------
+# compress_to_level
+# ----------------------------------------------------------------------
+
+def test_short_summary_is_kept_whole():
+    text = "One sentence here. Another one there."
+    assert compress_to_level(text, "quick") == text
+
+
+@pytest.mark.parametrize("level", ["quick", "detailed"])
+def test_compress_keeps_level_sentence_count_in_order(level):
+    sentences = split_sentences(ACADEMIC)
+    kept = split_sentences(compress_to_level(ACADEMIC, level))
+
+    assert len(kept) == LEVEL_SENTENCES[level]
+    # A subsequence of the original, in the original order
+    positions = [sentences.index(sentence) for sentence in kept]
+    assert positions == sorted(positions)
+
+
+def test_compress_drops_off_topic_sentences_first():
+    kept = compress_to_level(ACADEMIC, "quick")
+
+    assert "small town" not in kept
+    assert "weather" not in kept
+    assert "Photosynthesis converts light energy" in kept
+
+
+def test_compress_strips_list_markers():
+    kept = compress_to_level(ACADEMIC, "detailed")
+    assert not any(sentence.startswith(("-", "1.", "7.")) for sentence in split_sentences(kept))
+
+
+def test_unknown_level_compresses_like_quick():
+    assert compress_to_level(ACADEMIC, "academic") == compress_to_level(ACADEMIC, "quick")
+
+
+# ----------------------------------------------------------------------
+# _parse_level_sections
+# ----------------------------------------------------------------------
+
+@pytest.mark.parametrize("reply", [
+    "DETAILED: A long paragraph.\nQUICK: Short one.",
+    "**DETAILED:** A long paragraph.\n\n**QUICK:** Short one.",
+    "## DETAILED:\nA long paragraph.\n## QUICK:\nShort one.",
+    "Here you go:\n\ndetailed: A long paragraph.\nQuick : Short one.",
+])
+def test_parse_level_sections(service, reply):
+    sections = service._parse_level_sections(reply, ["detailed", "quick"])
+    assert sections == {"detailed": "A long paragraph.", "quick": "Short one."}
+
+
+def test_parse_ignores_labels_mid_line_and_empty_sections(service):
+    reply = "DETAILED:\nQUICK: The quick level is listed after DETAILED: in the reply."
+    sections = service._parse_level_sections(reply, ["detailed", "quick"])
+    assert sections == {"quick": "The quick level is listed after DETAILED: in the reply."}
+
+
+def test_parse_only_looks_for_requested_levels(service):
+    sections = service._parse_level_sections("DETAILED: Long.\nQUICK: Short.", ["detailed"])
+    assert sections == {"detailed": "Long.\nQUICK: Short."}
+
+
+# ----------------------------------------------------------------------
+# derive_summaries
+# ----------------------------------------------------------------------
+
+def test_derive_makes_one_call_on_the_summary(service):
+    service._model.reply = "DETAILED: A detailed rewrite.\nQUICK: A quick rewrite."
+
+    derived = service.derive_summaries(ACADEMIC, ["quick", "detailed"])
+
+    assert derived == {"quick": "A quick rewrite.", "detailed": "A detailed rewrite."}
+    assert len(service._model.prompts) == 1
+    assert ACADEMIC in service._model.prompts[0]
+
+
+def test_derive_compresses_levels_the_model_left_out(service):
+    service._model.reply = "DETAILED: A detailed rewrite."
+
+    derived = service.derive_summaries(ACADEMIC, ["quick", "detailed"])
+
+    assert derived["detailed"] == "A detailed rewrite."
+    assert derived["quick"] == compress_to_level(ACADEMIC, "quick")
+
+
+def test_derive_falls_back_to_local_on_model_error(service):
+    service._model.error = RuntimeError("upstream down")
+
+    derived = service.derive_summaries(ACADEMIC, ["quick", "detailed"])
+
+    assert derived == {level: compress_to_level(ACADEMIC, level) for level in ("quick", "detailed")}
+
+
+def test_derive_without_promptable_levels_makes_no_call(service):
+    derived = service.derive_summaries(ACADEMIC, ["academic"])
+
+    assert derived == {"academic": compress_to_level(ACADEMIC, "academic")}
+    assert service._model.prompts == []
@@ -0,0 +1,33 @@
+import pytest
+
+pytest.importorskip("starlette")
+
+from starlette.datastructures import Headers
+
+from api.tracing import ProfilingControl
+
+
+def test_authorized_needs_a_configured_token():
+    assert not ProfilingControl().authorized("anything")
+    assert not ProfilingControl(token="secret").authorized(None)
+    assert not ProfilingControl(token="secret").authorized("")
+
+
+def test_authorized_matches_token():
+    control = ProfilingControl(token="secret")
+    assert control.authorized("secret")
+    assert not control.authorized("secret2")
+
+
+def test_non_ascii_values_are_compared_not_raised():
+    control = ProfilingControl(token="secret")
+    assert not control.authorized("sécret")
+    assert not control.authorized("€")
+
+
+def test_non_ascii_token_matches_its_raw_header():
+    control = ProfilingControl(token="clé")
+    # What Starlette hands us for a header sent as UTF-8 bytes
+    headers = Headers(raw=[(b"x-profile", b"trace"), (b"x-profile-token", "clé".encode("utf-8"))])
+    assert control.authorized(headers.get("x-profile-token"))
+    assert control.mode_for(headers) == "trace"
@@ -1,4 +1,6 @@
 // chrome-extension/src/utils/api.js - COMPLETE FIXED VERSION
+import { contentHash } from './textUtils.js';
+
 const API_BASE_URL = 'http://localhost:8000'; // Your backend URL
 
 // ============================================
@@ -228,30 +230,108 @@ export const getSelectedText = async () => {
 // AI GENERATION FUNCTIONS
 // ============================================
 
+// Texts at least this long are looked up by hash before uploading, and
+// uploaded gzip-compressed. Below it the upload is cheaper than a miss.
+const GZIP_UPLOAD_MIN_CHARS = 4096;
+
 /**
- * Generate summary using your working backend
+ * Ask the backend for an already generated result by content hash.
+ * Returns the cached response, or null on a miss / any error / a short
+ * text, so the caller falls back to uploading the full text.
  */
-export const generateSummary = async (text, level = 'quick') => {
-  console.log(`📝 Generating ${level} summary for text: ${text.substring(0, 50)}...`);
-  
+const lookupCached = async (text, kind, level = 'quick', query = '') => {
+  if (text.length < GZIP_UPLOAD_MIN_CHARS) return null;
+
   try {
-    const response = await fetch(`${API_BASE_URL}/api/summary`, {
+    const hash = await contentHash(text);
+    const response = await fetch(`${API_BASE_URL}/api/lookup${query}`, {
       method: 'POST',
       headers: {
         'Content-Type': 'application/json',
       },
-      body: JSON.stringify({ 
-        text: text,
-        level: level 
-      })
+      body: JSON.stringify({ hash, kind, level })
     });
 
-    if (!response.ok) {
-      const errorData = await response.json().catch(() => ({}));
-      throw new Error(errorData.detail || `HTTP error! status: ${response.status}`);
-    }
+    if (!response.ok) return null;
 
     const data = await response.json();
+    if (data.status === 'miss') return null;
+
+    console.log(`⚡ ${kind} served from cache by hash`);
+    return data;
+  } catch (error) {
+    console.warn('⚠️ Lookup failed, uploading text instead:', error);
+    return null;
+  }
+};
+
+/**
+ * fetch() options that upload a long text as gzip-compressed text/plain
+ * (the backend reads other fields from the query string). Returns null
+ * for short texts or when CompressionStream is unavailable, so the caller
+ * sends plain JSON instead.
+ */
+const gzipTextUpload = async (text) => {
+  if (text.length < GZIP_UPLOAD_MIN_CHARS || typeof CompressionStream === 'undefined') {
+    return null;
+  }
+  const stream = new Blob([text]).stream().pipeThrough(new CompressionStream('gzip'));
+  return {
+    method: 'POST',
+    headers: {
+      'Content-Type': 'text/plain; charset=utf-8',
+      'Content-Encoding': 'gzip',
+    },
+    body: await new Response(stream).arrayBuffer()
+  };
+};
+
+// All summary levels of the last text sent, so switching levels doesn't
+// go back to the backend
+let lastSummaries = { text: null, summaries: null, data: null };
+
+/**
+ * Generate summary using your working backend
+ */
+export const generateSummary = async (text, level = 'quick') => {
+  console.log(`📝 Generating ${level} summary for text: ${text.substring(0, 50)}...`);
+  
+  try {
+    let data = null;
+    if (lastSummaries.text === text && lastSummaries.summaries?.[level]) {
+      data = { ...lastSummaries.data, summary: lastSummaries.summaries[level] };
+    } else {
+      data = await lookupCached(text, 'summary', level);
+    }
+
+    if (!data) {
+      // Ask for every level at once: the backend summarizes the full text
+      // once (academic) and derives the shorter levels from that
+      const upload = await gzipTextUpload(text);
+      const response = upload
+        ? await fetch(`${API_BASE_URL}/api/summary?level=${encodeURIComponent(level)}&all_levels=true`, upload)
+        : await fetch(`${API_BASE_URL}/api/summary`, {
+            method: 'POST',
+            headers: {
+              'Content-Type': 'application/json',
+            },
+            body: JSON.stringify({ 
+              text: text,
+              level: level,
+              all_levels: true
+            })
+          });
+
+      if (!response.ok) {
+        const errorData = await response.json().catch(() => ({}));
+        throw new Error(errorData.detail || `HTTP error! status: ${response.status}`);
+      }
+
+      data = await response.json();
+      if (data.summaries) {
+        lastSummaries = { text, summaries: data.summaries, data };
+      }
+    }
     console.log('✅ Summary API response:', data);
     
     return {
@@ -282,6 +362,34 @@ export const generateSummary = async (text, level = 'quick') => {
   }
 };
 
+/**
+ * Expand the backend's columnar mind map encoding (?format=compact)
+ * back into node and edge objects
+ */
+export const decodeCompactMindMap = (data) => {
+  const { types, labels, nodes: columns, edges: pairs, edge_label, dashed = [] } = data;
+  const dashedSet = new Set(dashed);
+
+  const nodes = columns.id.map((id, i) => {
+    const node = { id, label: columns.label[i] };
+    if (columns.type[i] >= 0) node.type = types[columns.type[i]];
+    if (columns.size[i] != null) node.size = columns.size[i];
+    if (columns.position && columns.position[i]) {
+      node.position = { x: columns.position[i][0], y: columns.position[i][1] };
+    }
+    return node;
+  });
+
+  const edges = pairs.map(([source, target], i) => {
+    const edge = { id: `edge_${i}`, source: columns.id[source], target: columns.id[target] };
+    if (edge_label[i] >= 0) edge.label = labels[edge_label[i]];
+    if (dashedSet.has(i)) edge.dashed = true;
+    return edge;
+  });
+
+  return { nodes, edges };
+};
+
 /**
  * Generate mind map using your working backend
  */
@@ -289,24 +397,33 @@ export const generateMindMap = async (text) => {
   console.log(`🗺️ Generating mind map for text: ${text.substring(0, 50)}...`);
   
   try {
-    const response = await fetch(`${API_BASE_URL}/api/mindmap`, {
-      method: 'POST',
-      headers: {
-        'Content-Type': 'application/json',
-      },
-      body: JSON.stringify({ 
-        text: text
-      })
-    });
+    let data = await lookupCached(text, 'mindmap', 'quick', '?format=compact');
 
-    if (!response.ok) {
-      const errorData = await response.json().catch(() => ({}));
-      throw new Error(errorData.detail || `HTTP error! status: ${response.status}`);
-    }
+    if (!data) {
+      const upload = await gzipTextUpload(text);
+      const response = await fetch(`${API_BASE_URL}/api/mindmap?format=compact`, upload || {
+        method: 'POST',
+        headers: {
+          'Content-Type': 'application/json',
+        },
+        body: JSON.stringify({ 
+          text: text
+        })
+      });
 
-    const data = await response.json();
+      if (!response.ok) {
+        const errorData = await response.json().catch(() => ({}));
+        throw new Error(errorData.detail || `HTTP error! status: ${response.status}`);
+      }
+
+      data = await response.json();
+    }
     console.log('✅ Mind Map API response:', data);
     
+    if (data.format === 'columnar-v1') {
+      data = { ...data, ...decodeCompactMindMap(data) };
+    }
+    
     return {
       success: true,
       nodes: data.nodes || data.data?.nodes || [],
@@ -625,6 +742,7 @@ export default {
   getSelectedText,
   generateSummary,
   generateMindMap,
+  decodeCompactMindMap,
   saveSummary,
   saveMindMap,
   getHistory,
@@ -141,4 +141,27 @@ export const formatFileSize = (bytes) => {
  */
 export const generateId = () => {
   return Date.now().toString(36) + Math.random().toString(36).substring(2);
-};
\ No newline at end of file
+};
+
+/**
+ * Normalize text exactly like the backend's normalize_text()
+ * (backend/services/result_cache.py) so content hashes match
+ */
+export const normalizeForHash = (text) => {
+  if (!text) return '';
+
+  return text
+    .replace(/[\t\n\v\f\r \u00a0\u1680\u2000-\u200a\u2028\u2029\u202f\u205f\u3000\ufeff]+/g, ' ')
+    .replace(/^ | $/g, '');
+};
+
+/**
+ * sha256 hex digest of the normalized text, used for /api/lookup
+ */
+export const contentHash = async (text) => {
+  const bytes = new TextEncoder().encode(normalizeForHash(text));
+  const digest = await crypto.subtle.digest('SHA-256', bytes);
+  return Array.from(new Uint8Array(digest))
+    .map(b => b.toString(16).padStart(2, '0'))
+    .join('');
+};